@@ -7,6 +7,7 @@ that collaborate to complete a task using GenFlow.
 
 import asyncio
 import logging
+from contextlib import AsyncExitStack
 from datetime import datetime
 
 from genflow import Agent, AgentConfig, WorkflowEngine, WorkflowBuilder, MessageBus
@@ -50,15 +51,14 @@ async def main():
         system_prompt="You are a report generator. You take analysis results and create comprehensive, well-formatted reports."
     ))
     
+    agents = [data_collector, data_analyzer, report_generator]
+    
     # Register agents with workflow engine
-    workflow_engine.register_agent(data_collector)
-    workflow_engine.register_agent(data_analyzer)
-    workflow_engine.register_agent(report_generator)
+    for agent in agents:
+        workflow_engine.register_agent(agent)
     
-    # Start agents
-    await data_collector.start()
-    await data_analyzer.start()
-    await report_generator.start()
+    # Start agents concurrently
+    await asyncio.gather(*(agent.start() for agent in agents))
     
     print(f"✅ Created and started {len(workflow_engine.list_agents())} agents")
     
@@ -69,7 +69,7 @@ async def main():
                 .add_task(
                     task_id="collect_data",
                     agent_id=data_collector.id,
-                    task_description="Collect sample sales data for the last quarter. Generate realistic data with products, quantities, dates, and revenues."
+                    task_description="Collect sample sales data for {company} for {quarter}. Generate realistic data with products, quantities, dates, and revenues."
                 )
                 .add_task(
                     task_id="analyze_data", 
@@ -80,7 +80,7 @@ async def main():
                 .add_task(
                     task_id="generate_report",
                     agent_id=report_generator.id, 
-                    task_description="Create a comprehensive quarterly sales report based on the analysis. Include executive summary, key findings, and recommendations.",
+                    task_description="Create a comprehensive {quarter} sales report for {company} based on the analysis. Include executive summary, key findings, and recommendations.",
                     depends_on=["analyze_data"]
                 )
                 .set_global_context({"quarter": "Q4 2024", "company": "GenFlow Demo Corp"})
@@ -93,8 +93,24 @@ async def main():
     print("▶️ Executing workflow...")
     start_time = datetime.now()
     
-    execution = await workflow_engine.execute_workflow(workflow_id)
-    
+    # Keep each agent's conversation open for the whole run so dependent
+    # tasks continue the same message history. Results are printed as each
+    # task finishes and released once no downstream task still needs them.
+    print(f"\n📋 Task Results:")
+    async with AsyncExitStack() as sessions:
+        for agent in agents:
+            await sessions.enter_async_context(agent.session(workflow_id))
+        async for event in workflow_engine.execute_workflow_stream(workflow_id, release_results=True):
+            print(f"\n🔸 Task: {event.task_id}")
+            print(f"  Status: {event.status}")
+            if event.result and event.result.success:
+                result_text = str(event.result.result)
+                result_preview = result_text[:200] + ("..." if len(result_text) > 200 else "")
+                print(f"  Result: {result_preview}")
+            if event.error:
+                print(f"  Error: {event.error}")
+    
+    execution = workflow_engine.get_workflow_status(workflow_id)
     end_time = datetime.now()
     duration = (end_time - start_time).total_seconds()
     
@@ -104,16 +120,6 @@ async def main():
     print(f"Duration: {duration:.2f} seconds")
     print(f"Tasks executed: {len(execution.task_executions)}")
     
-    print(f"\n📋 Task Results:")
-    for task_id, task_execution in execution.task_executions.items():
-        print(f"\n🔸 Task: {task_id}")
-        print(f"  Status: {task_execution.status}")
-        if task_execution.result:
-            result_preview = str(task_execution.result.result)[:200] + "..." if len(str(task_execution.result.result)) > 200 else str(task_execution.result.result)
-            print(f"  Result: {result_preview}")
-        if task_execution.error:
-            print(f"  Error: {task_execution.error}")
-    
     # Show final report if available
     report_task = execution.task_executions.get("generate_report")
     if report_task and report_task.result and report_task.result.success:
@@ -123,9 +129,7 @@ async def main():
         print("=" * 50)
     
     # Cleanup
-    await data_collector.stop()
-    await data_analyzer.stop()
-    await report_generator.stop()
+    await asyncio.gather(*(agent.stop() for agent in agents))
     await message_bus.stop()
     
     print("\n✅ Example completed successfully!")
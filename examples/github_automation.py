@@ -7,9 +7,11 @@ GitHub MCP server integration to automate repository tasks.
 
 import asyncio
 import logging
+from contextlib import AsyncExitStack
 from datetime import datetime
 
 from genflow import Agent, AgentConfig, WorkflowEngine, WorkflowBuilder, MessageBus, AgentFactory
+from genflow.agents import close_http_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,26 +31,15 @@ async def main():
     # Create agents with GitHub MCP integration
     print("📋 Creating GitHub-enabled agents...")
     
-    # Issue analyzer agent
+    # Issue and pull request analyzer agent
     issue_analyzer = AgentFactory.create_github_agent(
         name="issue_analyzer",
         description="Analyzes GitHub issues and pull requests",
-        system_prompt="""You are a GitHub issue analyzer. Your responsibilities:
+        system_prompt="""You are a GitHub issue and pull request analyzer. Your responsibilities:
 1. Review open issues and categorize them by type and priority
 2. Identify issues that need attention or are stale
-3. Suggest appropriate labels and assignments
-4. Provide summaries of issue status and trends"""
-    )
-    
-    # Code reviewer agent
-    code_reviewer = AgentFactory.create_github_agent(
-        name="code_reviewer", 
-        description="Reviews code and pull requests",
-        system_prompt="""You are an automated code reviewer. Your responsibilities:
-1. Review pull request changes for code quality
-2. Check for common issues, security concerns, and best practices
-3. Suggest improvements and optimizations  
-4. Validate that PR descriptions are complete and accurate"""
+3. Review pull request queues for code quality, conflicts and CI status
+4. Provide summaries of issue and PR status and trends"""
     )
     
     # Release coordinator agent
@@ -69,17 +60,14 @@ async def main():
         system_prompt="You create detailed reports from provided data, formatting them clearly and highlighting key insights."
     ))
     
+    agents = [issue_analyzer, release_coordinator, report_generator]
+    
     # Register agents with workflow engine
-    workflow_engine.register_agent(issue_analyzer)
-    workflow_engine.register_agent(code_reviewer)
-    workflow_engine.register_agent(release_coordinator)
-    workflow_engine.register_agent(report_generator)
+    for agent in agents:
+        workflow_engine.register_agent(agent)
     
-    # Start agents
-    await issue_analyzer.start()
-    await code_reviewer.start()
-    await release_coordinator.start()
-    await report_generator.start()
+    # Start agents concurrently
+    await asyncio.gather(*(agent.start() for agent in agents))
     
     print(f"✅ Created and started {len(workflow_engine.list_agents())} agents")
     
@@ -87,26 +75,25 @@ async def main():
     print("🏗️ Building GitHub automation workflow...")
     
     workflow = (WorkflowBuilder("github_automation", "Automated GitHub repository management and reporting")
-                .add_task(
-                    task_id="analyze_issues",
+                # Issues and PRs come from the same GitHub API, so fetch and
+                # analyze them in one call instead of two
+                .add_fused_task(
+                    task_id="analyze_issues_and_prs",
                     agent_id=issue_analyzer.id,
-                    task_description="""Analyze the current state of GitHub issues in the repository:
+                    subtasks={
+                        "analyze_issues": """Analyze the current state of GitHub issues in the repository:
 1. List all open issues with their labels, assignees, and age
 2. Categorize issues by type (bug, feature, documentation, etc.)
 3. Identify stale issues (older than 30 days with no activity)
 4. Suggest prioritization based on labels and activity
-5. Provide a summary of issue health metrics"""
-                )
-                .add_task(
-                    task_id="review_pull_requests", 
-                    agent_id=code_reviewer.id,
-                    task_description="""Review current pull requests in the repository:
+5. Provide a summary of issue health metrics""",
+                        "review_pull_requests": """Review current pull requests in the repository:
 1. List all open pull requests with basic information
 2. Check for PRs that need review or have been waiting too long
 3. Identify any PRs with merge conflicts or CI failures
 4. Suggest review assignments based on changed files
 5. Provide summary of PR queue health""",
-                    depends_on=[]  # Can run in parallel with issue analysis
+                    }
                 )
                 .add_task(
                     task_id="assess_release_readiness",
@@ -117,7 +104,7 @@ async def main():
 3. Identify potential release blockers
 4. Generate preliminary release notes for recent changes
 5. Suggest next release timeline and version number""",
-                    depends_on=["analyze_issues", "review_pull_requests"]
+                    depends_on=["analyze_issues_and_prs"]
                 )
                 .add_task(
                     task_id="generate_status_report",
@@ -128,7 +115,7 @@ async def main():
 3. Highlight urgent items that need attention
 4. Provide recommendations for repository maintenance
 5. Format as a professional status report""",
-                    depends_on=["analyze_issues", "review_pull_requests", "assess_release_readiness"]
+                    depends_on=["analyze_issues_and_prs", "assess_release_readiness"]
                 )
                 .set_global_context({
                     "repository": "mocraimer/GenFlow",
@@ -150,8 +137,24 @@ async def main():
     start_time = datetime.now()
     
     try:
-        execution = await workflow_engine.execute_workflow(workflow_id)
+        # Keep each agent's conversation open for the whole run so dependent
+        # tasks continue the same message history. Results are printed as each
+        # task finishes and released once no downstream task still needs them.
+        print(f"\n📋 Task Results:")
+        async with AsyncExitStack() as sessions:
+            for agent in agents:
+                await sessions.enter_async_context(agent.session(workflow_id))
+            async for event in workflow_engine.execute_workflow_stream(workflow_id, release_results=True):
+                print(f"\n🔸 Task: {event.task_id}")
+                print(f"  Status: {event.status}")
+                if event.result and event.result.success:
+                    result_text = str(event.result.result)
+                    result_preview = result_text[:300] + ("..." if len(result_text) > 300 else "")
+                    print(f"  Result: {result_preview}")
+                if event.error:
+                    print(f"  Execution Error: {event.error}")
         
+        execution = workflow_engine.get_workflow_status(workflow_id)
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
         
@@ -161,19 +164,6 @@ async def main():
         print(f"Duration: {duration:.2f} seconds")
         print(f"Tasks executed: {len(execution.task_executions)}")
         
-        print(f"\n📋 Task Results:")
-        for task_id, task_execution in execution.task_executions.items():
-            print(f"\n🔸 Task: {task_id}")
-            print(f"  Status: {task_execution.status}")
-            if task_execution.result:
-                if task_execution.result.success:
-                    result_preview = str(task_execution.result.result)[:300] + "..." if len(str(task_execution.result.result)) > 300 else str(task_execution.result.result)
-                    print(f"  Result: {result_preview}")
-                else:
-                    print(f"  Error: {task_execution.result.error}")
-            if task_execution.error:
-                print(f"  Execution Error: {task_execution.error}")
-        
         # Show final status report if available
         report_task = execution.task_executions.get("generate_status_report")
         if report_task and report_task.result and report_task.result.success:
@@ -201,11 +191,9 @@ async def main():
         print("3. Ensure you have access to the repository specified in the workflow")
     
     # Cleanup
-    await issue_analyzer.stop()
-    await code_reviewer.stop()
-    await release_coordinator.stop()
-    await report_generator.stop()
+    await asyncio.gather(*(agent.stop() for agent in agents))
     await message_bus.stop()
+    await close_http_client()
     
     print("\n✅ GitHub automation example completed!")
 
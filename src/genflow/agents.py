@@ -6,49 +6,276 @@ in GenFlow workflows, built on top of airflow-ai-bridge MCP integration.
 """
 
 import asyncio
+import functools
+import importlib.util
+import itertools
 import logging
+import os
+import secrets
+import sys
+import weakref
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
-from uuid import uuid4
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
 
-from pydantic import BaseModel, Field
-from pydantic_ai import Agent as PydanticAgent
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from .batching import LLMBatchQueue
+
+if TYPE_CHECKING:
+    import httpx
+    from pydantic_ai import Agent as PydanticAgent
+    from .workflow import WorkflowDefinition
 
 logger = logging.getLogger(__name__)
 
+# Process-unique IDs: one random prefix per process plus a counter, so creating
+# agents and messages does not read from the OS entropy pool every time
+_ID_PREFIX = secrets.token_hex(4)
+_ID_COUNTER = itertools.count()
+
+
+def _next_id() -> str:
+    """Generate a process-unique identifier."""
+    return f"{_ID_PREFIX}{next(_ID_COUNTER):x}"
+
+
+class MCPServerSpec(NamedTuple):
+    """Hashable description of an MCP server an agent connects to."""
+    
+    command: str
+    args: Tuple[str, ...] = ()
+    env: Tuple[Tuple[str, str], ...] = ()
+    timeout: Optional[float] = None
+    
+    @classmethod
+    def from_dict(cls, server: Dict[str, Any]) -> "MCPServerSpec":
+        """Build a spec from a dictionary server configuration."""
+        return cls(
+            command=server["command"],
+            args=tuple(server.get("args") or ()),
+            env=tuple(sorted((server.get("env") or {}).items())),
+            timeout=server.get("timeout")
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the dictionary form used by MCP tool registration."""
+        server: Dict[str, Any] = {"command": self.command}
+        if self.args:
+            server["args"] = list(self.args)
+        if self.env:
+            server["env"] = dict(self.env)
+        if self.timeout is not None:
+            server["timeout"] = self.timeout
+        return server
+
 
 class AgentConfig(BaseModel):
     """Configuration for an agent."""
     
+    model_config = ConfigDict(frozen=True)
+    
     name: str
     description: str = ""
     model: str = "gpt-4o"
     system_prompt: str = ""
-    mcp_servers: List[Dict[str, Any]] = Field(default_factory=list)
+    mcp_servers: Tuple[MCPServerSpec, ...] = ()
     max_retries: int = 3
     timeout: float = 300.0
+    batchable: bool = False
+    
+    @field_validator("system_prompt")
+    @classmethod
+    def _intern_system_prompt(cls, value: str) -> str:
+        """Share one copy of system prompts repeated across agents."""
+        return sys.intern(value)
+    
+    @field_validator("mcp_servers", mode="before")
+    @classmethod
+    def _parse_mcp_servers(cls, value: Any) -> Any:
+        """Accept dictionary server configurations alongside specs."""
+        return tuple(
+            MCPServerSpec.from_dict(server) if isinstance(server, dict) else server
+            for server in value
+        )
 
 
 class AgentMessage(BaseModel):
     """Message sent between agents."""
     
-    id: str = Field(default_factory=lambda: str(uuid4()))
+    model_config = ConfigDict(frozen=True)
+    
+    id: str = Field(default_factory=_next_id)
     sender: str
     recipient: str
     content: str
     message_type: str = "general"
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    
+    @field_validator("sender", "recipient")
+    @classmethod
+    def _intern_agent_id(cls, value: str) -> str:
+        """Intern agent IDs so routing lookups on the bus match by identity."""
+        return sys.intern(value)
 
 
 class AgentResponse(BaseModel):
     """Response from an agent execution."""
     
+    model_config = ConfigDict(frozen=True)
+    
     success: bool
     result: Any = None
     error: Optional[str] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
+# Underlying AI agents shared between GenFlow agents with the same configuration,
+# and the configurations whose MCP tools have already been registered
+_AI_AGENT_POOL: Dict[tuple, "PydanticAgent"] = {}
+_MCP_REGISTERED: Set[tuple] = set()
+_MCP_REGISTRATION_LOCKS: Dict[tuple, asyncio.Lock] = {}
+
+# AI runs from agents configured with ``batchable`` are grouped here
+_BATCH_QUEUE = LLMBatchQueue()
+
+# Concurrent MCP tool registrations allowed when GENFLOW_MAX_MCP is unset or invalid,
+# and the semaphore enforcing the limit in each event loop
+_DEFAULT_MAX_MCP = 4
+_MCP_SPAWN_LIMITS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+@functools.cache
+def _get_pydantic_agent_cls() -> type:
+    """Import pydantic_ai on first use; it pulls in a large dependency tree."""
+    from pydantic_ai import Agent as PydanticAgent
+    return PydanticAgent
+
+
+@functools.cache
+def _get_register_mcp_tools() -> Callable[..., Awaitable[Any]]:
+    """Import the airflow-ai-bridge MCP tool registration on first use."""
+    # Import here to avoid circular dependencies
+    from airflow_ai_bridge.tools import register_mcp_tools
+    return register_mcp_tools
+
+
+@functools.cache
+def _get_max_mcp() -> int:
+    """Read the cap on concurrent MCP tool registrations from ``GENFLOW_MAX_MCP`` on first use."""
+    value = os.environ.get("GENFLOW_MAX_MCP")
+    limit = _DEFAULT_MAX_MCP
+    if value is not None:
+        try:
+            limit = int(value)
+            if limit < 1:
+                raise ValueError(value)
+        except ValueError:
+            logger.warning(
+                "Invalid GENFLOW_MAX_MCP value %r, using %d", value, _DEFAULT_MAX_MCP
+            )
+            limit = _DEFAULT_MAX_MCP
+    return limit
+
+
+def _get_mcp_spawn_limit() -> asyncio.Semaphore:
+    """
+    Get the semaphore capping concurrent MCP tool registrations in the running loop.
+    
+    Registering MCP tools spawns the configured MCP server processes, so the
+    cap keeps many agents starting at once from fork-storming the host. A
+    semaphore binds to the loop it is first contended in, so each event
+    loop gets its own.
+    """
+    loop = asyncio.get_running_loop()
+    limit = _MCP_SPAWN_LIMITS.get(loop)
+    if limit is None:
+        limit = _MCP_SPAWN_LIMITS[loop] = asyncio.Semaphore(_get_max_mcp())
+    return limit
+
+
+@functools.cache
+def _get_shared_http_client() -> "httpx.AsyncClient":
+    """
+    Create the HTTP client shared by all OpenAI-backed agents.
+    
+    Pooling connections across agents avoids a TLS handshake per agent and,
+    when the ``h2`` package is installed, multiplexes concurrent requests
+    over HTTP/2.
+    """
+    import httpx
+    return httpx.AsyncClient(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        timeout=httpx.Timeout(300.0)
+    )
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client; call once when shutting down."""
+    if _get_shared_http_client.cache_info().currsize:
+        client = _get_shared_http_client()
+        _get_shared_http_client.cache_clear()
+        await asyncio.shield(client.aclose())
+
+
+def _resolve_model(model: str) -> Any:
+    """Map a model name to a pydantic_ai model, sharing HTTP connections where supported."""
+    if model.startswith("openai:"):
+        model_name = model[len("openai:"):]
+    elif model.startswith(("gpt-", "o1", "o3")):
+        model_name = model
+    else:
+        # Let pydantic_ai resolve other providers from the name
+        return model
+    
+    from pydantic_ai.models.openai import OpenAIModel
+    return OpenAIModel(model_name, http_client=_get_shared_http_client())
+
+
+def _ai_agent_key(config: AgentConfig) -> tuple:
+    """Build the pool key identifying an agent's underlying AI agent."""
+    return (config.model, config.system_prompt, config.mcp_servers)
+
+
+MessageHandlerFunc = Callable[[AgentMessage], Awaitable[Optional[AgentResponse]]]
+
+
+def _handler_error_response(message: AgentMessage, error: Exception) -> AgentResponse:
+    """Build the failure response for a message handler that raised."""
+    logger.error("Error handling message %s: %s", message.id, error)
+    return AgentResponse(
+        success=False,
+        error=str(error),
+        metadata={"message_id": message.id}
+    )
+
+
+class AgentSession:
+    """
+    Conversation state shared by consecutive executions of one agent.
+    
+    While a session is active, each AI run continues the previous run's
+    message history instead of starting from the caller-provided history,
+    so a chain of dependent tasks shares a stable prompt prefix that the
+    model server can cache.
+    """
+    
+    def __init__(self, agent: "Agent", session_id: Optional[str] = None):
+        self.agent = agent
+        self.id = session_id or _next_id()
+        self.message_history: List[Any] = []
+    
+    async def __aenter__(self) -> "AgentSession":
+        self.agent._session = self
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self.agent._session is self:
+            self.agent._session = None
+
+
 class BaseAgent(ABC):
     """
     Base class for all GenFlow agents.
@@ -59,61 +286,84 @@ class BaseAgent(ABC):
     
     def __init__(self, config: AgentConfig):
         self.config = config
-        self.id = f"{config.name}_{uuid4().hex[:8]}"
+        self.id = f"{config.name}_{_next_id()}"
         self._running = False
-        self._message_handlers: Dict[str, callable] = {}
+        self._message_handlers: Dict[str, MessageHandlerFunc] = {}
         
         # Initialize underlying AI agent if MCP servers are configured
         if config.mcp_servers:
-            self._ai_agent = PydanticAgent(
-                model=config.model,
-                system_prompt=config.system_prompt
-            )
+            key = _ai_agent_key(config)
+            if key not in _AI_AGENT_POOL:
+                _AI_AGENT_POOL[key] = _get_pydantic_agent_cls()(
+                    model=_resolve_model(config.model),
+                    system_prompt=config.system_prompt
+                )
+            self._ai_agent = _AI_AGENT_POOL[key]
         else:
             self._ai_agent = None
             
-        logger.info(f"Created agent {self.id} with config: {config.name}")
+        logger.info("Created agent %s with config: %s", self.id, config.name)
     
     @abstractmethod
     async def execute(self, task: str, context: Dict[str, Any] = None) -> AgentResponse:
         """Execute a task and return the response."""
         pass
     
+    async def execute_chain(
+        self,
+        steps: List[Tuple[str, str]],
+        contexts: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, AgentResponse]:
+        """
+        Execute a linear chain of dependent tasks.
+        
+        Steps are ``(task_id, task_description)`` pairs in dependency order;
+        ``contexts`` maps task IDs to the context of each step. The default
+        implementation runs the steps one by one and stops at the first
+        failure; subclasses can submit the whole chain in a single call, and
+        only those are handed chains by the workflow engine.
+        """
+        contexts = contexts or {}
+        results: Dict[str, AgentResponse] = {}
+        for task_id, description in steps:
+            response = await self.execute(description, contexts.get(task_id))
+            results[task_id] = response
+            if not response.success:
+                break
+        return results
+    
     async def start(self) -> None:
         """Start the agent."""
         self._running = True
-        logger.info(f"Started agent {self.id}")
+        logger.info("Started agent %s", self.id)
     
     async def stop(self) -> None:
         """Stop the agent."""
         self._running = False
-        logger.info(f"Stopped agent {self.id}")
+        logger.info("Stopped agent %s", self.id)
     
     def is_running(self) -> bool:
         """Check if agent is running."""
         return self._running
     
-    def register_message_handler(self, message_type: str, handler: callable) -> None:
+    def register_message_handler(self, message_type: str, handler: MessageHandlerFunc) -> None:
         """Register a handler for a specific message type."""
-        self._message_handlers[message_type] = handler
-        logger.debug(f"Registered handler for message type: {message_type}")
+        # Interned keys let dispatch lookups hit the string identity fast path
+        self._message_handlers[sys.intern(message_type)] = handler
+        logger.debug("Registered handler for message type: %s", message_type)
     
     async def handle_message(self, message: AgentMessage) -> Optional[AgentResponse]:
         """Handle incoming message."""
-        handler = self._message_handlers.get(message.message_type)
-        if handler:
-            try:
-                return await handler(message)
-            except Exception as e:
-                logger.error(f"Error handling message {message.id}: {e}")
-                return AgentResponse(
-                    success=False,
-                    error=str(e),
-                    metadata={"message_id": message.id}
-                )
-        else:
-            logger.warning(f"No handler for message type: {message.message_type}")
+        try:
+            handler = self._message_handlers[message.message_type]
+        except KeyError:
+            logger.warning("No handler for message type: %s", message.message_type)
             return None
+        
+        try:
+            return await handler(message)
+        except Exception as e:
+            return _handler_error_response(message, e)
 
 
 class Agent(BaseAgent):
@@ -124,6 +374,23 @@ class Agent(BaseAgent):
     Can be used directly or extended for specific use cases.
     """
     
+    _session: Optional[AgentSession] = None
+    
+    def session(self, session_id: Optional[str] = None) -> AgentSession:
+        """Open a conversation session reused by executions inside ``async with``."""
+        return AgentSession(self, session_id)
+    
+    def _message_history(self, context: Dict[str, Any]) -> List[Any]:
+        """Get the message history for the next AI run."""
+        if self._session is not None:
+            return self._session.message_history
+        return context.get("history", [])
+    
+    def _record_history(self, result: Any) -> None:
+        """Keep the AI run's messages in the active session, if any."""
+        if self._session is not None:
+            self._session.message_history = result.all_messages()
+    
     async def execute(self, task: str, context: Dict[str, Any] = None) -> AgentResponse:
         """Execute a task using the AI agent."""
         if context is None:
@@ -131,12 +398,15 @@ class Agent(BaseAgent):
             
         try:
             if self._ai_agent:
-                # Register MCP tools if configured
-                if self.config.mcp_servers:
-                    await self._register_mcp_tools()
+                await self._ensure_mcp_tools()
                 
                 # Run the AI agent
-                result = await self._ai_agent.run(task, message_history=context.get("history", []))
+                message_history = self._message_history(context)
+                if self.config.batchable:
+                    result = await _BATCH_QUEUE.submit(self._ai_agent, task, message_history)
+                else:
+                    result = await self._ai_agent.run(task, message_history=message_history)
+                self._record_history(result)
                 
                 return AgentResponse(
                     success=True,
@@ -152,13 +422,60 @@ class Agent(BaseAgent):
                 return await self._execute_simple(task, context)
                 
         except Exception as e:
-            logger.error(f"Agent {self.id} execution failed: {e}")
+            logger.error("Agent %s execution failed: %s", self.id, e)
             return AgentResponse(
                 success=False,
                 error=str(e),
                 metadata={"agent_id": self.id}
             )
     
+    async def execute_chain(
+        self,
+        steps: List[Tuple[str, str]],
+        contexts: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, AgentResponse]:
+        """
+        Execute a chain of tasks in a single AI agent round trip.
+        
+        The message history is taken from the first step's context. If the
+        run fails, every step gets a failed response carrying the error.
+        """
+        if not self._ai_agent or len(steps) < 2:
+            return await super().execute_chain(steps, contexts)
+        
+        context = (contexts or {}).get(steps[0][0]) or {}
+        
+        try:
+            await self._ensure_mcp_tools()
+            prompt = _build_chain_prompt(steps)
+            result = await self._ai_agent.run(prompt, message_history=self._message_history(context))
+            self._record_history(result)
+        except Exception as e:
+            logger.error("Agent %s chain execution failed: %s", self.id, e)
+            return {
+                task_id: AgentResponse(
+                    success=False,
+                    error=str(e),
+                    metadata={"agent_id": self.id, "chained": True}
+                )
+                for task_id, _ in steps
+            }
+        
+        sections = _split_chain_output(str(result.data), [task_id for task_id, _ in steps])
+        return {
+            task_id: AgentResponse(
+                success=True,
+                result=section,
+                metadata={
+                    "agent_id": self.id,
+                    "model": self.config.model,
+                    "usage": getattr(result, "usage", {}),
+                    "chained": True
+                }
+            )
+            for task_id, section in sections.items()
+        }
+    
     async def _execute_simple(self, task: str, context: Dict[str, Any]) -> AgentResponse:
         """Simple execution for agents without AI capabilities."""
         return AgentResponse(
@@ -167,20 +484,79 @@ class Agent(BaseAgent):
             metadata={"agent_id": self.id, "execution_type": "simple"}
         )
     
+    async def start(self) -> None:
+        """Start the agent, registering its MCP tools."""
+        if self.config.mcp_servers:
+            await self._register_mcp_tools()
+        await super().start()
+    
+    async def _ensure_mcp_tools(self) -> None:
+        """Register MCP tools on first use for agents executed without being started."""
+        if self.config.mcp_servers and _ai_agent_key(self.config) not in _MCP_REGISTERED:
+            await self._register_mcp_tools()
+    
     async def _register_mcp_tools(self) -> None:
-        """Register MCP tools with the AI agent."""
+        """Register MCP tools with the AI agent once per pooled AI agent."""
         try:
-            # Import here to avoid circular dependencies
-            from airflow_ai_bridge.tools import register_mcp_tools
+            register_mcp_tools = _get_register_mcp_tools()
             
             if self._ai_agent and self.config.mcp_servers:
-                await register_mcp_tools(self._ai_agent, self.config.mcp_servers)
-                logger.debug(f"Registered MCP tools for agent {self.id}")
+                key = _ai_agent_key(self.config)
+                lock = _MCP_REGISTRATION_LOCKS.setdefault(key, asyncio.Lock())
+                async with lock:
+                    if key in _MCP_REGISTERED:
+                        return
+                    async with _get_mcp_spawn_limit():
+                        await register_mcp_tools(
+                            self._ai_agent,
+                            [server.to_dict() for server in self.config.mcp_servers]
+                        )
+                    _MCP_REGISTERED.add(key)
+                logger.debug("Registered MCP tools for agent %s", self.id)
                 
         except ImportError:
             logger.warning("airflow-ai-bridge not available, skipping MCP tool registration")
         except Exception as e:
-            logger.error(f"Failed to register MCP tools for agent {self.id}: {e}")
+            logger.error("Failed to register MCP tools for agent %s: %s", self.id, e)
+
+
+def _build_sectioned_prompt(instructions: str, sections: Iterable[Tuple[str, str]]) -> str:
+    """Build a prompt of instructions followed by one ``### <id>`` section per item."""
+    parts = [instructions]
+    for section_id, description in sections:
+        parts.append(f"### {section_id}\n{description}")
+    return "\n\n".join(parts)
+
+
+def _build_chain_prompt(steps: List[Tuple[str, str]]) -> str:
+    """Build a single prompt covering every step of a task chain."""
+    return _build_sectioned_prompt(
+        "Complete the following steps in order. Each step may use the results "
+        "of the previous steps. Start the answer to each step with a line "
+        "containing only '### <step id>'.",
+        steps
+    )
+
+
+def _split_chain_output(output: str, task_ids: List[str]) -> Dict[str, str]:
+    """Split a chained response into per-step sections; missing steps are omitted."""
+    sections: Dict[str, str] = {}
+    current: Optional[str] = None
+    lines: List[str] = []
+    
+    for line in output.splitlines():
+        header = line.strip()
+        if header.startswith("###") and header[3:].strip() in task_ids:
+            if current is not None:
+                sections[current] = "\n".join(lines).strip()
+            current = header[3:].strip()
+            lines = []
+        elif current is not None:
+            lines.append(line)
+    
+    if current is not None:
+        sections[current] = "\n".join(lines).strip()
+    return sections
 
 
 class WorkflowAgent(Agent):
@@ -194,13 +570,13 @@ class WorkflowAgent(Agent):
     def __init__(self, config: AgentConfig):
         # Override system prompt for workflow management
         if not config.system_prompt:
-            config.system_prompt = """You are a workflow management agent. Your role is to:
+            config = config.model_copy(update={"system_prompt": """You are a workflow management agent. Your role is to:
 1. Create and modify workflow definitions
 2. Coordinate execution between multiple agents
 3. Monitor workflow progress and handle errors
 4. Generate reports on workflow outcomes
 
-You have access to various tools through MCP servers for interacting with external systems."""
+You have access to various tools through MCP servers for interacting with external systems."""})
         
         super().__init__(config)
         self._managed_workflows: Dict[str, "Workflow"] = {}
@@ -232,7 +608,12 @@ Provide detailed status updates and any necessary modifications based on current
     def register_workflow(self, workflow_id: str, workflow: "Workflow") -> None:
         """Register a workflow for management."""
         self._managed_workflows[workflow_id] = workflow
-        logger.info(f"Registered workflow {workflow_id} with agent {self.id}")
+        logger.info("Registered workflow %s with agent %s", workflow_id, self.id)
+    
+    def register_workflows(self, workflows: Dict[str, "WorkflowDefinition"]) -> None:
+        """Register several workflows for management at once."""
+        self._managed_workflows.update(workflows)
+        logger.info("Registered %d workflows with agent %s", len(workflows), self.id)
     
     def get_managed_workflows(self) -> List[str]:
         """Get list of managed workflow IDs."""
@@ -260,7 +641,7 @@ class AgentFactory:
         config = AgentConfig(
             name=name,
             description="Agent with GitHub integration",
-            mcp_servers=[{"command": "mcp-server-github"}],
+            mcp_servers=(MCPServerSpec(command="mcp-server-github"),),
             **kwargs
         )
         return Agent(config)
@@ -271,10 +652,7 @@ class AgentFactory:
         config = AgentConfig(
             name=name,
             description="Agent with filesystem access",
-            mcp_servers=[{
-                "command": "mcp-server-filesystem",
-                "args": ["--root", root_path]
-            }],
+            mcp_servers=(MCPServerSpec(command="mcp-server-filesystem", args=("--root", root_path)),),
             **kwargs
         )
         return Agent(config)
\ No newline at end of file
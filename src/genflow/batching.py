@@ -0,0 +1,141 @@
+"""
+Request batching for GenFlow agents.
+
+Collects AI agent runs issued within a short window and dispatches them
+together, so sibling tasks that hit the same model go out as one burst over
+the shared HTTP connection pool, and identical prompts are only sent once.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _BatchRequest:
+    """A pending AI agent run waiting in the batch queue."""
+    
+    __slots__ = ("ai_agent", "prompt", "message_history", "future")
+    
+    def __init__(self, ai_agent: Any, prompt: str, message_history: List[Any], future: asyncio.Future):
+        self.ai_agent = ai_agent
+        self.prompt = prompt
+        self.message_history = message_history
+        self.future = future
+
+
+class LLMBatchQueue:
+    """
+    Queue that groups AI agent runs into batches.
+    
+    A batch is flushed once ``max_batch`` requests are waiting or ``flush_ms``
+    milliseconds after its first request arrived. Requests without message
+    history that target the same AI agent with the same prompt are coalesced
+    into a single run. The worker starts on the first ``submit`` in the
+    running event loop.
+    """
+    
+    def __init__(self, max_batch: int = 8, flush_ms: float = 20.0):
+        self.max_batch = max_batch
+        self.flush_ms = flush_ms
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "runs": 0
+        }
+    
+    async def submit(self, ai_agent: Any, prompt: str, message_history: Optional[List[Any]] = None) -> Any:
+        """Queue an AI agent run and wait for its result."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put(_BatchRequest(ai_agent, prompt, message_history or [], future))
+        return await future
+    
+    async def stop(self) -> None:
+        """Stop the worker, cancelling requests that have not been dispatched."""
+        if self._worker_task:
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+        
+        while self._queue and not self._queue.empty():
+            self._queue.get_nowait().future.cancel()
+        
+        self._queue = None
+        self._loop = None
+        self._worker_task = None
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get batching statistics."""
+        return self._stats.copy()
+    
+    def _ensure_worker(self) -> None:
+        """Start the worker in the running loop, replacing one from a previous loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker_task is None or self._worker_task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker_task = loop.create_task(self._process_batches())
+    
+    async def _process_batches(self) -> None:
+        """Collect requests into batches and dispatch them."""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.flush_ms / 1000
+            
+            while len(batch) < self.max_batch:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Dispatch in the background so the next batch can start collecting
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatch_tasks.add(task)
+            task.add_done_callback(self._dispatch_tasks.discard)
+    
+    async def _dispatch(self, batch: List[_BatchRequest]) -> None:
+        """Run a batch of requests concurrently, coalescing identical ones."""
+        groups: Dict[Tuple[int, str], List[_BatchRequest]] = {}
+        runs: List[List[_BatchRequest]] = []
+        for request in batch:
+            if request.message_history:
+                runs.append([request])
+                continue
+            key = (id(request.ai_agent), request.prompt)
+            if key not in groups:
+                groups[key] = []
+                runs.append(groups[key])
+            groups[key].append(request)
+        
+        self._stats["requests"] += len(batch)
+        self._stats["batches"] += 1
+        self._stats["runs"] += len(runs)
+        logger.debug(f"Dispatching batch of {len(batch)} requests as {len(runs)} runs")
+        
+        await asyncio.gather(*(self._run(requests) for requests in runs))
+    
+    async def _run(self, requests: List[_BatchRequest]) -> None:
+        """Run one AI agent call and resolve every request waiting on it."""
+        first = requests[0]
+        try:
+            result = await first.ai_agent.run(first.prompt, message_history=first.message_history)
+        except Exception as e:
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        
+        for request in requests:
+            if not request.future.done():
+                request.future.set_result(result)
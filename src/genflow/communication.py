@@ -6,14 +6,16 @@ and share information during workflow execution.
 """
 
 import asyncio
+import itertools
 import logging
-from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, List, Optional, Set
-from uuid import uuid4
+import operator
+import sys
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
 
 from pydantic import BaseModel, Field
 
-from .agents import AgentMessage, AgentResponse
+from .agents import AgentMessage, AgentResponse, _next_id
 
 logger = logging.getLogger(__name__)
 
@@ -27,42 +29,89 @@ class MessageFilter(BaseModel):
     metadata_filters: Dict[str, Any] = Field(default_factory=dict)
 
 
+# Sentinel for metadata keys missing from a message
+_MISSING = object()
+
+# Shared empty routing bucket for messages no indexed handler subscribes to
+_NO_HANDLERS: Dict[str, "MessageHandler"] = {}
+
+# Shared result for polls by agents that are not registered with the bus
+_NO_MESSAGES: Tuple[AgentMessage, ...] = ()
+
+
+def _match_any(message: AgentMessage) -> bool:
+    """Predicate for filters that set no criteria."""
+    return True
+
+
+def _compile_filter(filter_spec: MessageFilter) -> Callable[[AgentMessage], bool]:
+    """
+    Build a predicate checking messages against a filter, resolved once up front.
+    
+    Only the criteria the filter sets are checked: field criteria become a
+    single ``attrgetter`` call compared with the expected values, so the
+    predicate does no per-message branching on which fields are set.
+    """
+    fields = tuple(
+        (name, value)
+        for name, value in (
+            ("sender", filter_spec.sender),
+            ("recipient", filter_spec.recipient),
+            ("message_type", filter_spec.message_type),
+        )
+        if value
+    )
+    metadata_checks = tuple(filter_spec.metadata_filters.items())
+    
+    if fields:
+        get_fields = operator.attrgetter(*(name for name, _ in fields))
+        # attrgetter returns a bare value for one name and a tuple for several
+        expected = fields[0][1] if len(fields) == 1 else tuple(value for _, value in fields)
+    
+    if not metadata_checks:
+        if not fields:
+            return _match_any
+        return lambda message: get_fields(message) == expected
+    
+    def metadata_matches(message: AgentMessage) -> bool:
+        metadata = message.metadata
+        for key, expected_value in metadata_checks:
+            if metadata.get(key, _MISSING) != expected_value:
+                return False
+        return True
+    
+    if not fields:
+        return metadata_matches
+    return lambda message: get_fields(message) == expected and metadata_matches(message)
+
+
 class MessageHandler:
     """Handler for processing messages."""
     
+    __slots__ = ("handler_func", "filter_spec", "id", "_is_coroutine", "_matches")
+    
     def __init__(self, handler_func: Callable, filter_spec: MessageFilter):
         self.handler_func = handler_func
         self.filter_spec = filter_spec
-        self.id = str(uuid4())
+        self.id = _next_id()
+        self._is_coroutine = asyncio.iscoroutinefunction(handler_func)
+        self._matches = _compile_filter(filter_spec)
     
     def matches(self, message: AgentMessage) -> bool:
         """Check if message matches this handler's filter."""
-        if self.filter_spec.sender and message.sender != self.filter_spec.sender:
-            return False
-        
-        if self.filter_spec.recipient and message.recipient != self.filter_spec.recipient:
-            return False
-        
-        if self.filter_spec.message_type and message.message_type != self.filter_spec.message_type:
-            return False
-        
-        # Check metadata filters
-        for key, expected_value in self.filter_spec.metadata_filters.items():
-            if key not in message.metadata or message.metadata[key] != expected_value:
-                return False
-        
-        return True
+        return self._matches(message)
     
     async def handle(self, message: AgentMessage) -> Optional[AgentResponse]:
         """Handle the message."""
         try:
-            if asyncio.iscoroutinefunction(self.handler_func):
+            if self._is_coroutine:
                 return await self.handler_func(message)
             else:
                 return self.handler_func(message)
         except Exception as e:
             logger.error(f"Message handler {self.id} failed: {e}")
-            return AgentResponse(
+            # Fields are already the right types, so skip validation
+            return AgentResponse.model_construct(
                 success=False,
                 error=str(e),
                 metadata={"handler_id": self.id, "message_id": message.id}
@@ -70,46 +119,128 @@ class MessageHandler:
 
 
 class MessageQueue:
-    """Message queue for agent communication."""
+    """
+    Message queue for agent communication.
     
-    def __init__(self, max_size: int = 1000):
-        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
-        self._message_history: List[AgentMessage] = []
-        self._max_history = 10000
+    Messages are kept in a deque; waiting callers block on events that are
+    set when the queue becomes non-empty or gains free space, so enqueueing
+    and dequeueing are plain deque operations. A ``max_size`` of zero or
+    less means the queue is unbounded.
+    """
+    
+    def __init__(self, max_size: int = 1000, max_history: int = 10000):
+        self._messages: Deque[AgentMessage] = deque()
+        self._max_size = max_size
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._max_history = max_history
+        self._message_history: Deque[AgentMessage] = deque(maxlen=max_history)
     
     async def put(self, message: AgentMessage) -> None:
-        """Put a message in the queue."""
-        await self._queue.put(message)
+        """Put a message in the queue, waiting only if it is full."""
+        while True:
+            try:
+                self.put_nowait(message)
+                return
+            except asyncio.QueueFull:
+                await self._not_full.wait()
+    
+    def put_nowait(self, message: AgentMessage) -> None:
+        """Put a message in the queue without waiting; raises ``asyncio.QueueFull``."""
+        if self.full():
+            raise asyncio.QueueFull
+        
+        self._messages.append(message)
+        self._not_empty.set()
+        if self.full():
+            self._not_full.clear()
+        self._record(message)
+    
+    async def put_many(self, messages: List[AgentMessage]) -> None:
+        """Put messages in the queue in order, waiting whenever it is full."""
+        put_count = self.put_many_nowait(messages)
+        for message in messages[put_count:]:
+            await self.put(message)
+    
+    def put_many_nowait(self, messages: List[AgentMessage]) -> int:
+        """
+        Put as many messages as fit without waiting.
+        
+        Returns how many leading messages were queued.
+        """
+        if self._max_size > 0:
+            room = max(0, self._max_size - len(self._messages))
+            if room < len(messages):
+                messages = messages[:room]
+        if not messages:
+            return 0
         
-        # Add to history
+        self._messages.extend(messages)
+        self._message_history.extend(messages)
+        self._not_empty.set()
+        if self.full():
+            self._not_full.clear()
+        return len(messages)
+    
+    def _record(self, message: AgentMessage) -> None:
+        """Add a queued message to the history, dropping the oldest beyond the limit."""
         self._message_history.append(message)
-        if len(self._message_history) > self._max_history:
-            self._message_history = self._message_history[-self._max_history//2:]
     
     async def get(self) -> AgentMessage:
         """Get a message from the queue."""
-        return await self._queue.get()
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                await self._not_empty.wait()
+    
+    def get_nowait(self) -> AgentMessage:
+        """Get a message without waiting; raises ``asyncio.QueueEmpty``."""
+        if not self._messages:
+            raise asyncio.QueueEmpty
+        
+        message = self._messages.popleft()
+        self._not_full.set()
+        if not self._messages:
+            self._not_empty.clear()
+        return message
+    
+    def drain_nowait(self) -> List[AgentMessage]:
+        """Take every queued message at once, oldest first, without waiting."""
+        messages = list(self._messages)
+        if messages:
+            self._messages.clear()
+            self._not_empty.clear()
+            self._not_full.set()
+        return messages
+    
+    def clear(self) -> None:
+        """Drop all queued messages and the message history."""
+        self.drain_nowait()
+        self._message_history.clear()
     
     def empty(self) -> bool:
         """Check if queue is empty."""
-        return self._queue.empty()
+        return not self._messages
+    
+    def full(self) -> bool:
+        """Check if queue is full."""
+        return 0 < self._max_size <= len(self._messages)
     
     def qsize(self) -> int:
         """Get queue size."""
-        return self._queue.qsize()
+        return len(self._messages)
     
     def get_history(self, limit: int = 100, filter_spec: Optional[MessageFilter] = None) -> List[AgentMessage]:
         """Get message history with optional filtering."""
-        history = self._message_history[-limit:]
+        # Walk back from the newest end so only ``limit`` entries are visited
+        history = list(itertools.islice(reversed(self._message_history), max(limit, 0)))
+        history.reverse()
         
         if filter_spec:
-            filtered_history = []
-            for msg in history:
-                # Create a temporary handler to use the filtering logic
-                temp_handler = MessageHandler(lambda x: None, filter_spec)
-                if temp_handler.matches(msg):
-                    filtered_history.append(msg)
-            return filtered_history
+            matches = _compile_filter(filter_spec)
+            return [msg for msg in history if matches(msg)]
         
         return history
 
@@ -122,18 +253,26 @@ class MessageBus:
     Supports both point-to-point and broadcast communication patterns.
     """
     
-    def __init__(self):
+    def __init__(self, dispatch_batch_size: int = 32):
         self._agents: Set[str] = set()
-        self._handlers: List[MessageHandler] = []
+        self._dispatch_batch_size = dispatch_batch_size
+        self._handlers: Dict[str, MessageHandler] = {}
+        # Routing indexes: each handler sits in exactly one bucket, picked by the
+        # most selective filter it sets, so routing never scans every subscription
+        # and candidate buckets never overlap. Buckets map handler ID to handler.
+        self._by_recipient: Dict[str, Dict[str, MessageHandler]] = {}
+        self._by_sender: Dict[str, Dict[str, MessageHandler]] = {}
+        self._by_type: Dict[str, Dict[str, MessageHandler]] = {}
+        self._unfiltered: Dict[str, MessageHandler] = {}
+        # Replies awaited by request_response, keyed by correlation ID
+        self._pending_responses: Dict[str, Tuple[str, asyncio.Future]] = {}
         self._queues: Dict[str, MessageQueue] = {}
         self._global_queue = MessageQueue()
         self._running = False
         self._message_processor_task: Optional[asyncio.Task] = None
-        self._stats = {
-            "messages_sent": 0,
-            "messages_delivered": 0,
-            "messages_failed": 0
-        }
+        self._n_sent = 0
+        self._n_delivered = 0
+        self._n_failed = 0
     
     async def start(self) -> None:
         """Start the message bus."""
@@ -160,8 +299,30 @@ class MessageBus:
         
         logger.info("Message bus stopped")
     
+    def reset(self) -> None:
+        """
+        Forget all agents, subscriptions, queued messages, history and statistics.
+        
+        A running bus keeps running. Replies still awaited through
+        ``expect_response`` are cancelled.
+        """
+        for _, future in self._pending_responses.values():
+            if not future.done():
+                future.cancel()
+        self._pending_responses.clear()
+        self._agents.clear()
+        self._handlers.clear()
+        self._by_recipient.clear()
+        self._by_sender.clear()
+        self._by_type.clear()
+        self._unfiltered.clear()
+        self._queues.clear()
+        self._global_queue.clear()
+        self._n_sent = self._n_delivered = self._n_failed = 0
+    
     def register_agent(self, agent_id: str) -> None:
         """Register an agent with the message bus."""
+        agent_id = sys.intern(agent_id)
         self._agents.add(agent_id)
         self._queues[agent_id] = MessageQueue()
         logger.debug(f"Registered agent {agent_id} with message bus")
@@ -193,30 +354,69 @@ class MessageBus:
         )
         
         handler = MessageHandler(handler_func, filter_spec)
-        self._handlers.append(handler)
+        self._handlers[handler.id] = handler
+        self._handler_bucket(filter_spec)[handler.id] = handler
         
         logger.debug(f"Added message handler {handler.id} with filter: {filter_spec}")
         return handler.id
     
     def unsubscribe(self, handler_id: str) -> bool:
         """Unsubscribe a message handler."""
-        for i, handler in enumerate(self._handlers):
-            if handler.id == handler_id:
-                del self._handlers[i]
-                logger.debug(f"Removed message handler {handler_id}")
-                return True
-        return False
+        handler = self._handlers.pop(handler_id, None)
+        if handler is None:
+            return False
+        
+        filter_spec = handler.filter_spec
+        bucket = self._handler_bucket(filter_spec)
+        del bucket[handler_id]
+        if not bucket:
+            if filter_spec.recipient:
+                del self._by_recipient[filter_spec.recipient]
+            elif filter_spec.sender:
+                del self._by_sender[filter_spec.sender]
+            elif filter_spec.message_type:
+                del self._by_type[filter_spec.message_type]
+        
+        logger.debug(f"Removed message handler {handler_id}")
+        return True
+    
+    def _handler_bucket(self, filter_spec: MessageFilter) -> Dict[str, MessageHandler]:
+        """Get the routing index bucket for handlers with the given filter."""
+        if filter_spec.recipient:
+            return self._by_recipient.setdefault(filter_spec.recipient, {})
+        if filter_spec.sender:
+            return self._by_sender.setdefault(filter_spec.sender, {})
+        if filter_spec.message_type:
+            return self._by_type.setdefault(filter_spec.message_type, {})
+        return self._unfiltered
+    
+    def expect_response(self, correlation_id: str, responder: str) -> asyncio.Future:
+        """
+        Register interest in a reply from ``responder`` with the given correlation ID.
+        
+        The returned future resolves with the reply when it is routed; the reply
+        is then not placed in the requester's queue.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending_responses[correlation_id] = (responder, future)
+        return future
+    
+    def discard_response(self, correlation_id: str) -> None:
+        """Stop waiting for a reply registered with ``expect_response``."""
+        pending = self._pending_responses.pop(correlation_id, None)
+        if pending and not pending[1].done():
+            pending[1].cancel()
     
     async def send_message(self, message: AgentMessage) -> bool:
         """Send a message through the bus."""
         try:
             await self._global_queue.put(message)
-            self._stats["messages_sent"] += 1
+            self._n_sent += 1
             logger.debug(f"Queued message {message.id} from {message.sender} to {message.recipient}")
             return True
         except Exception as e:
             logger.error(f"Failed to queue message {message.id}: {e}")
-            self._stats["messages_failed"] += 1
+            self._n_failed += 1
             return False
     
     async def send_broadcast(self, sender: str, content: str, message_type: str = "broadcast", **metadata: Any) -> bool:
@@ -230,38 +430,54 @@ class MessageBus:
         )
         return await self.send_message(message)
     
-    async def get_messages(self, agent_id: str, timeout: float = 1.0) -> List[AgentMessage]:
-        """Get pending messages for an agent."""
-        if agent_id not in self._queues:
-            return []
+    async def get_messages(self, agent_id: str, timeout: float = 1.0) -> Sequence[AgentMessage]:
+        """
+        Get pending messages for an agent.
+        
+        If nothing is pending, waits up to ``timeout`` seconds for the first
+        message to arrive, then returns it along with anything queued behind it.
+        """
+        queue = self._queues.get(agent_id)
+        if queue is None:
+            return _NO_MESSAGES
         
         messages = []
-        queue = self._queues[agent_id]
         
         try:
-            # Get all available messages with timeout
-            while not queue.empty():
+            if queue.empty() and timeout > 0:
                 try:
-                    message = await asyncio.wait_for(queue.get(), timeout=0.1)
-                    messages.append(message)
+                    messages.append(await asyncio.wait_for(queue.get(), timeout=timeout))
                 except asyncio.TimeoutError:
-                    break
+                    return messages
+            
+            # Drain everything else that is already queued
+            messages.extend(queue.drain_nowait())
         except Exception as e:
             logger.error(f"Error getting messages for agent {agent_id}: {e}")
         
         return messages
     
     async def _process_messages(self) -> None:
-        """Process messages from the global queue."""
+        """
+        Process messages from the global queue until cancelled by ``stop``.
+        
+        Messages already queued are routed together in batches of up to
+        ``dispatch_batch_size`` without waiting on the queue between them;
+        after a full batch the processor yields so a busy bus cannot starve
+        other tasks.
+        """
         while self._running:
             try:
-                # Get message with timeout
-                try:
-                    message = await asyncio.wait_for(self._global_queue.get(), timeout=1.0)
-                except asyncio.TimeoutError:
-                    continue
+                batch = [await self._global_queue.get()]
+                while len(batch) < self._dispatch_batch_size:
+                    try:
+                        batch.append(self._global_queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
                 
-                await self._route_message(message)
+                await self._route_batch(batch)
+                if len(batch) == self._dispatch_batch_size:
+                    await asyncio.sleep(0)
                 
             except Exception as e:
                 logger.error(f"Error processing messages: {e}")
@@ -269,61 +485,114 @@ class MessageBus:
     
     async def _route_message(self, message: AgentMessage) -> None:
         """Route a message to appropriate handlers and recipients."""
-        try:
-            # Handle broadcast messages
+        await self._route_batch([message])
+    
+    async def _route_batch(self, messages: List[AgentMessage]) -> None:
+        """
+        Route a batch of messages to their recipients and handlers.
+        
+        Deliveries are grouped by recipient so each queue is filled once per
+        batch. Messages are immutable, so every recipient of a broadcast gets
+        the same instance, still addressed to ``"*"``.
+        """
+        deliveries: Dict[str, List[AgentMessage]] = {}
+        for message in messages:
             if message.recipient == "*":
                 for agent_id in self._agents:
-                    if agent_id != message.sender:
-                        targeted_message = AgentMessage(
-                            id=str(uuid4()),
-                            sender=message.sender,
-                            recipient=agent_id,
-                            content=message.content,
-                            message_type=message.message_type,
-                            metadata=message.metadata
-                        )
-                        await self._deliver_message(targeted_message)
+                    if agent_id != message.sender and agent_id in self._queues:
+                        deliveries.setdefault(agent_id, []).append(message)
+            elif self._resolve_response(message):
+                continue
+            elif message.recipient in self._queues:
+                deliveries.setdefault(message.recipient, []).append(message)
             else:
-                # Direct message
-                await self._deliver_message(message)
-            
-            # Process through handlers
-            await self._process_handlers(message)
-            
-            self._stats["messages_delivered"] += 1
-            
+                logger.warning(f"Recipient {message.recipient} not registered for message {message.id}")
+        
+        try:
+            await self._deliver_batch(deliveries)
         except Exception as e:
-            logger.error(f"Error routing message {message.id}: {e}")
-            self._stats["messages_failed"] += 1
-    
-    async def _deliver_message(self, message: AgentMessage) -> None:
-        """Deliver a message to specific recipient."""
-        if message.recipient in self._queues:
+            logger.error(f"Failed to deliver batch of {len(messages)} messages: {e}")
+        
+        for message in messages:
             try:
-                await self._queues[message.recipient].put(message)
-                logger.debug(f"Delivered message {message.id} to {message.recipient}")
+                # Process through handlers
+                await self._process_handlers(message)
+                self._n_delivered += 1
             except Exception as e:
-                logger.error(f"Failed to deliver message {message.id} to {message.recipient}: {e}")
-        else:
-            logger.warning(f"Recipient {message.recipient} not registered for message {message.id}")
+                logger.error(f"Error routing message {message.id}: {e}")
+                self._n_failed += 1
+    
+    def _resolve_response(self, message: AgentMessage) -> bool:
+        """Hand a reply to its waiting ``request_response`` call, if any."""
+        correlation_id = message.metadata.get("correlation_id")
+        if not correlation_id or correlation_id not in self._pending_responses:
+            return False
+        
+        responder, future = self._pending_responses[correlation_id]
+        if message.sender != responder:
+            return False
+        
+        del self._pending_responses[correlation_id]
+        if not future.done():
+            future.set_result(message)
+        logger.debug(f"Resolved response {correlation_id} with message {message.id}")
+        return True
+    
+    async def _deliver_batch(self, deliveries: Dict[str, List[AgentMessage]]) -> None:
+        """
+        Put each recipient's messages in its queue in one operation.
+        
+        Queues with room are filled without awaiting; only full queues are
+        awaited, concurrently.
+        """
+        slow_puts = []
+        for agent_id, queued in deliveries.items():
+            queue = self._queues[agent_id]
+            put_count = queue.put_many_nowait(queued)
+            if put_count < len(queued):
+                slow_puts.append(queue.put_many(queued[put_count:]))
+        
+        if len(slow_puts) == 1:
+            await slow_puts[0]
+        elif slow_puts:
+            await asyncio.gather(*slow_puts)
     
     async def _process_handlers(self, message: AgentMessage) -> None:
         """Process message through registered handlers."""
-        matching_handlers = [h for h in self._handlers if h.matches(message)]
+        candidates = itertools.chain(
+            self._by_recipient.get(message.recipient, _NO_HANDLERS).values(),
+            self._by_sender.get(message.sender, _NO_HANDLERS).values(),
+            self._by_type.get(message.message_type, _NO_HANDLERS).values(),
+            self._unfiltered.values()
+        )
+        matching_handlers = [h for h in candidates if h.matches(message)]
         
-        if matching_handlers:
-            # Run handlers concurrently
-            handler_tasks = [handler.handle(message) for handler in matching_handlers]
-            results = await asyncio.gather(*handler_tasks, return_exceptions=True)
-            
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    logger.error(f"Handler {matching_handlers[i].id} failed: {result}")
+        if not matching_handlers:
+            return
+        
+        if len(matching_handlers) == 1:
+            # A single handler needs no gathering
+            handler = matching_handlers[0]
+            try:
+                await handler.handle(message)
+            except Exception as e:
+                logger.error(f"Handler {handler.id} failed: {e}")
+            return
+        
+        # Run handlers concurrently
+        handler_tasks = [handler.handle(message) for handler in matching_handlers]
+        results = await asyncio.gather(*handler_tasks, return_exceptions=True)
+        
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Handler {matching_handlers[i].id} failed: {result}")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get message bus statistics."""
         return {
-            **self._stats,
+            "messages_sent": self._n_sent,
+            "messages_delivered": self._n_delivered,
+            "messages_failed": self._n_failed,
             "registered_agents": len(self._agents),
             "active_handlers": len(self._handlers),
             "queue_sizes": {agent_id: queue.qsize() for agent_id, queue in self._queues.items()}
@@ -378,7 +647,7 @@ class AgentCommunication:
             self.agent_id, content, message_type, **metadata
         )
     
-    async def receive(self, timeout: float = 1.0) -> List[AgentMessage]:
+    async def receive(self, timeout: float = 1.0) -> Sequence[AgentMessage]:
         """Receive pending messages."""
         return await self.message_bus.get_messages(self.agent_id, timeout)
     
@@ -424,29 +693,28 @@ class AgentCommunication:
         Send a request and wait for a response.
         
         This implements a request-response pattern by sending a message
-        and waiting for a reply with matching correlation ID.
+        and waiting for a reply with matching correlation ID. The reply is
+        handed over by the bus as soon as it is routed.
         """
-        correlation_id = str(uuid4())
-        
-        # Send request
-        success = await self.send(
-            recipient,
-            content,
-            message_type,
-            correlation_id=correlation_id,
-            expects_response=True
-        )
+        correlation_id = _next_id()
+        response = self.message_bus.expect_response(correlation_id, recipient)
         
-        if not success:
+        try:
+            # Send request
+            success = await self.send(
+                recipient,
+                content,
+                message_type,
+                correlation_id=correlation_id,
+                expects_response=True
+            )
+            
+            if not success:
+                return None
+            
+            # Wait for the bus to route the reply to us
+            return await asyncio.wait_for(response, timeout=timeout)
+        except asyncio.TimeoutError:
             return None
-        
-        # Wait for response
-        start_time = datetime.utcnow()
-        while (datetime.utcnow() - start_time).total_seconds() < timeout:
-            messages = await self.receive(timeout=1.0)
-            for message in messages:
-                if (message.sender == recipient and 
-                    message.metadata.get("correlation_id") == correlation_id):
-                    return message
-        
-        return None
\ No newline at end of file
+        finally:
+            self.message_bus.discard_response(correlation_id)
\ No newline at end of file
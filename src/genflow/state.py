@@ -0,0 +1,87 @@
+"""
+Execution state storage for GenFlow.
+
+Lets a WorkflowEngine write workflow execution state to a store outside the
+process, so the state of a run survives a restart and can be read by other
+processes.
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, Optional, Protocol
+
+if TYPE_CHECKING:
+    from .workflow import WorkflowExecution
+
+
+class StateStore(Protocol):
+    """Storage for workflow execution state."""
+    
+    async def save_execution(self, execution: "WorkflowExecution") -> None:
+        """Store the current state of an execution, replacing any earlier state."""
+        ...
+    
+    async def load_execution(self, workflow_id: str) -> Optional["WorkflowExecution"]:
+        """Load the last stored state of a workflow's execution."""
+        ...
+
+
+class InMemoryStore:
+    """State store that keeps executions in a dict, for tests and single-process use."""
+    
+    def __init__(self):
+        self._executions: Dict[str, "WorkflowExecution"] = {}
+    
+    async def save_execution(self, execution: "WorkflowExecution") -> None:
+        """Store the current state of an execution."""
+        self._executions[execution.workflow_id] = execution
+    
+    async def load_execution(self, workflow_id: str) -> Optional["WorkflowExecution"]:
+        """Load the stored execution of a workflow."""
+        return self._executions.get(workflow_id)
+
+
+class RedisStore:
+    """
+    State store that keeps executions as JSON in Redis.
+    
+    Requires the ``redis`` package. Executions are stored under
+    ``<prefix>:wf:<workflow id>`` and expire after ``ttl`` seconds if set.
+    """
+    
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "genflow",
+        ttl: Optional[float] = None,
+        client: Any = None
+    ):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+        self._client = client
+        self._prefix = prefix
+        self._ttl_ms = int(ttl * 1000) if ttl else None
+    
+    def _key(self, workflow_id: str) -> str:
+        """Get the Redis key for a workflow's execution."""
+        return f"{self._prefix}:wf:{workflow_id}"
+    
+    async def save_execution(self, execution: "WorkflowExecution") -> None:
+        """Store the current state of an execution."""
+        await self._client.set(
+            self._key(execution.workflow_id),
+            execution.model_dump_json(),
+            px=self._ttl_ms
+        )
+    
+    async def load_execution(self, workflow_id: str) -> Optional["WorkflowExecution"]:
+        """Load the stored execution of a workflow."""
+        from .workflow import WorkflowExecution
+        
+        data = await self._client.get(self._key(workflow_id))
+        if data is None:
+            return None
+        return WorkflowExecution.model_validate_json(data)
+    
+    async def close(self) -> None:
+        """Close the Redis connection."""
+        await self._client.aclose()
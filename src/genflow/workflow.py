@@ -6,18 +6,73 @@ integrated with Airflow through airflow-ai-bridge.
 """
 
 import asyncio
+import hashlib
+import json
 import logging
-from datetime import datetime, timedelta
+import re
+import sys
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set, Union
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Union
 from uuid import uuid4
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, field_serializer, field_validator
 
-from .agents import BaseAgent, AgentResponse
+from .agents import BaseAgent, AgentResponse, _build_sectioned_prompt, _split_chain_output
+from .state import StateStore
 
 logger = logging.getLogger(__name__)
 
+# ``{name}`` placeholders in task descriptions, filled from the global and task context
+_PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
+# Offset from the monotonic clock to wall-clock time, for reporting task timestamps
+_WALL_CLOCK_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _utcnow() -> datetime:
+    """Get the current time as a naive UTC datetime, as reported for workflows and tasks."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _monotonic_to_datetime(timestamp_ns: Optional[int]) -> Optional[datetime]:
+    """Convert a ``time.monotonic_ns()`` reading to a naive UTC datetime."""
+    if timestamp_ns is None:
+        return None
+    return _EPOCH + timedelta(microseconds=(timestamp_ns + _WALL_CLOCK_OFFSET_NS) // 1000)
+
+
+def _datetime_to_monotonic(value: Optional[datetime]) -> Optional[int]:
+    """Convert a UTC datetime back to a ``time.monotonic_ns()`` reading of this process."""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(microseconds=1) * 1000 - _WALL_CLOCK_OFFSET_NS
+
+
+def _render_description(description: str, values: Dict[str, Any]) -> str:
+    """
+    Fill ``{name}`` placeholders in a task description from ``values``.
+    
+    Placeholders without a matching key and other braces, such as literal
+    JSON, are left untouched.
+    """
+    def substitute(match: "re.Match[str]") -> str:
+        key = match.group(1)
+        return str(values[key]) if key in values else match.group(0)
+    
+    return _PLACEHOLDER_PATTERN.sub(substitute, description)
+
+
+class _WorkflowAborted(Exception):
+    """Raised inside the task group to cancel a fail-fast workflow."""
+
 
 class TaskStatus(str, Enum):
     """Status of a workflow task."""
@@ -49,22 +104,118 @@ class TaskDefinition(BaseModel):
     retry_count: int = 3
     timeout: float = 300.0
     context: Dict[str, Any] = Field(default_factory=dict)
+    cacheable: bool = False
+    
+    @field_validator("id", "agent_id")
+    @classmethod
+    def _intern_string(cls, value: str) -> str:
+        """Share one copy of IDs repeated across tasks and workflow builds."""
+        return sys.intern(value)
+    
+    @field_validator("depends_on")
+    @classmethod
+    def _intern_dependencies(cls, value: List[str]) -> List[str]:
+        """Intern dependency IDs so they match task IDs by identity in lookups."""
+        return [sys.intern(dep) for dep in value]
 
 
-class TaskExecution(BaseModel):
-    """Runtime execution state of a task."""
+@dataclass(slots=True)
+class TaskExecution:
+    """
+    Runtime execution state of a task.
+    
+    A plain slotted dataclass rather than a model: one is created per task on
+    every run and updated constantly, and it never needs input validation.
+    Pydantic still serializes it as part of ``WorkflowExecution``.
+    
+    Start and end are recorded as ``time.monotonic_ns()`` readings and only
+    converted to naive UTC datetimes when read through ``start_time`` and
+    ``end_time``, which is also how ``WorkflowExecution`` serializes them.
+    """
     
     task_id: str
     status: TaskStatus = TaskStatus.PENDING
-    start_time: Optional[datetime] = None
-    end_time: Optional[datetime] = None
+    start_ns: Optional[int] = None
+    end_ns: Optional[int] = None
     attempts: int = 0
     result: Optional[AgentResponse] = None
     error: Optional[str] = None
+    fingerprint: Optional[str] = None
+    
+    @property
+    def start_time(self) -> Optional[datetime]:
+        """When the task first started running."""
+        return _monotonic_to_datetime(self.start_ns)
+    
+    @property
+    def end_time(self) -> Optional[datetime]:
+        """When the task reached its final state."""
+        return _monotonic_to_datetime(self.end_ns)
+    
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds between start and end, if the task has finished."""
+        if self.start_ns is None or self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+class _TaskGraph:
+    """Lookup tables derived once from a workflow's task list."""
+    
+    __slots__ = (
+        "tasks", "dependents", "indegree", "order", "base_contexts", "placeholders", "descriptions", "valid"
+    )
+    
+    def __init__(self, tasks: List[TaskDefinition], global_context: Dict[str, Any]):
+        self.tasks: Dict[str, TaskDefinition] = {task.id: task for task in tasks}
+        # Merged global and task context; copied for each run, so agents cannot change them
+        self.base_contexts: Dict[str, Dict[str, Any]] = {
+            task.id: {**global_context, **task.context} for task in tasks
+        }
+        # Descriptions with placeholders filled from the base contexts, rendered
+        # once here; ``placeholders`` holds the context keys each one used
+        self.placeholders: Dict[str, frozenset] = {}
+        self.descriptions: Dict[str, str] = {}
+        for task in tasks:
+            base_context = self.base_contexts[task.id]
+            keys = frozenset(_PLACEHOLDER_PATTERN.findall(task.task_description)).intersection(base_context)
+            self.placeholders[task.id] = keys
+            self.descriptions[task.id] = (
+                _render_description(task.task_description, base_context) if keys else task.task_description
+            )
+        self.dependents: Dict[str, List[str]] = {task.id: [] for task in tasks}
+        for task in tasks:
+            for dep in task.depends_on:
+                self.dependents.setdefault(dep, []).append(task.id)
+        
+        self.indegree: Dict[str, int] = {task.id: len(task.depends_on) for task in tasks}
+        
+        # Kahn's algorithm; tasks on a cycle or behind a missing dependency are left out
+        indegree = dict(self.indegree)
+        ready = deque(task.id for task in tasks if not task.depends_on)
+        self.order: List[str] = []
+        while ready:
+            task_id = ready.popleft()
+            self.order.append(task_id)
+            for dependent in self.dependents[task_id]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+        
+        # Result of WorkflowDefinition.validate_dependencies, filled in on first call
+        self.valid: Optional[bool] = None
 
 
 class WorkflowDefinition(BaseModel):
-    """Definition of a complete workflow."""
+    """
+    Definition of a complete workflow.
+    
+    Task lookups go through a graph built on first use. Assigning ``tasks``
+    or ``global_context`` and adding tasks through the builder drop it; after
+    changing the task list, task dependencies or contexts in place, call
+    ``invalidate_graph``.
+    """
     
     id: str = Field(default_factory=lambda: str(uuid4()))
     name: str
@@ -73,13 +224,48 @@ class WorkflowDefinition(BaseModel):
     global_context: Dict[str, Any] = Field(default_factory=dict)
     max_parallel_tasks: int = 5
     default_timeout: float = 600.0
+    fail_fast: bool = False
+    chain_tasks: bool = False
+    
+    _graph_cache: Optional[_TaskGraph] = PrivateAttr(default=None)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in ("tasks", "global_context"):
+            self.invalidate_graph()
+    
+    def invalidate_graph(self) -> None:
+        """Drop the cached task graph so the next lookup rebuilds it from the current tasks."""
+        self._graph_cache = None
+    
+    def _graph(self) -> _TaskGraph:
+        """Get the task graph, building it on first use after an invalidation."""
+        if self._graph_cache is None:
+            self._graph_cache = _TaskGraph(self.tasks, self.global_context)
+        return self._graph_cache
+    
+    def _task_context(self, task_id: str, execution_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Get a fresh copy of the context passed to a task's agent."""
+        base_context = self._graph().base_contexts[task_id]
+        return base_context | execution_context if execution_context else dict(base_context)
+    
+    def _task_description(self, task_id: str, execution_context: Dict[str, Any]) -> str:
+        """
+        Get a task's description with global and task context placeholders filled.
+        
+        The description rendered with the task graph is reused unless the
+        execution context overrides one of the keys it filled in.
+        """
+        graph = self._graph()
+        keys = graph.placeholders[task_id]
+        if execution_context and not keys.isdisjoint(execution_context):
+            values = {**graph.base_contexts[task_id], **execution_context}
+            return _render_description(graph.tasks[task_id].task_description, {key: values[key] for key in keys})
+        return graph.descriptions[task_id]
     
     def get_task(self, task_id: str) -> Optional[TaskDefinition]:
         """Get a task by ID."""
-        for task in self.tasks:
-            if task.id == task_id:
-                return task
-        return None
+        return self._graph().tasks.get(task_id)
     
     def get_dependencies(self, task_id: str) -> List[str]:
         """Get dependencies for a task."""
@@ -88,44 +274,40 @@ class WorkflowDefinition(BaseModel):
     
     def get_dependents(self, task_id: str) -> List[str]:
         """Get tasks that depend on the given task."""
-        dependents = []
-        for task in self.tasks:
-            if task_id in task.depends_on:
-                dependents.append(task.id)
-        return dependents
+        return list(self._graph().dependents.get(task_id, ()))
+    
+    def topological_order(self) -> List[str]:
+        """Get task IDs ordered so every task comes after its dependencies."""
+        return list(self._graph().order)
     
     def validate_dependencies(self) -> bool:
-        """Validate that all dependencies exist and there are no cycles."""
-        task_ids = {task.id for task in self.tasks}
+        """
+        Validate that all dependencies exist and there are no cycles.
         
+        The result is kept with the task graph, so repeated calls on an
+        unchanged workflow (by the builder, then the engine) check it once.
+        """
+        graph = self._graph()
+        if graph.valid is None:
+            graph.valid = self._check_dependencies(graph)
+        return graph.valid
+    
+    def _check_dependencies(self, graph: _TaskGraph) -> bool:
+        """Check the workflow's dependencies against its task graph, logging the first problem."""
         # Check all dependencies exist
         for task in self.tasks:
             for dep in task.depends_on:
-                if dep not in task_ids:
+                if dep not in graph.tasks:
                     logger.error(f"Task {task.id} depends on non-existent task {dep}")
                     return False
         
-        # Check for cycles using DFS
-        def has_cycle(task_id: str, visited: Set[str], rec_stack: Set[str]) -> bool:
-            visited.add(task_id)
-            rec_stack.add(task_id)
-            
-            for dep in self.get_dependents(task_id):
-                if dep not in visited:
-                    if has_cycle(dep, visited, rec_stack):
-                        return True
-                elif dep in rec_stack:
-                    return True
-            
-            rec_stack.remove(task_id)
-            return False
-        
-        visited = set()
+        # Check for cycles: with every dependency present, only tasks on or
+        # behind a cycle are missing from the graph's Kahn ordering
+        ordered = set(graph.order)
         for task in self.tasks:
-            if task.id not in visited:
-                if has_cycle(task.id, visited, set()):
-                    logger.error("Cycle detected in workflow dependencies")
-                    return False
+            if task.id not in ordered:
+                logger.error(f"Cycle detected in workflow dependencies at task {task.id}")
+                return False
         
         return True
 
@@ -140,6 +322,42 @@ class WorkflowExecution(BaseModel):
     task_executions: Dict[str, TaskExecution] = Field(default_factory=dict)
     execution_context: Dict[str, Any] = Field(default_factory=dict)
     
+    @field_validator("task_executions", mode="before")
+    @classmethod
+    def _task_times_from_datetimes(cls, value: Any) -> Any:
+        """Read serialized task start and end times back into clock readings."""
+        if not isinstance(value, dict):
+            return value
+        
+        task_executions = {}
+        for task_id, task_execution in value.items():
+            if isinstance(task_execution, dict):
+                task_execution = dict(task_execution)
+                for name in ("start", "end"):
+                    timestamp = task_execution.pop(f"{name}_time", None)
+                    if isinstance(timestamp, str):
+                        timestamp = datetime.fromisoformat(timestamp)
+                    task_execution.setdefault(f"{name}_ns", _datetime_to_monotonic(timestamp))
+            task_executions[task_id] = task_execution
+        return task_executions
+    
+    @field_serializer("task_executions")
+    def _task_times_as_datetimes(self, task_executions: Dict[str, TaskExecution]) -> Dict[str, Dict[str, Any]]:
+        """Serialize task start and end times as datetimes rather than clock readings."""
+        return {
+            task_id: {
+                "task_id": task_execution.task_id,
+                "status": task_execution.status,
+                "start_time": task_execution.start_time,
+                "end_time": task_execution.end_time,
+                "attempts": task_execution.attempts,
+                "result": task_execution.result,
+                "error": task_execution.error,
+                "fingerprint": task_execution.fingerprint
+            }
+            for task_id, task_execution in task_executions.items()
+        }
+    
     def get_task_execution(self, task_id: str) -> Optional[TaskExecution]:
         """Get execution state for a task."""
         return self.task_executions.get(task_id)
@@ -152,11 +370,93 @@ class WorkflowExecution(BaseModel):
         execution = self.task_executions[task_id]
         execution.status = status
         execution.result = result
+        if status == TaskStatus.FAILED and result is not None:
+            execution.error = result.error
         
-        if status == TaskStatus.RUNNING and not execution.start_time:
-            execution.start_time = datetime.utcnow()
-        elif status in [TaskStatus.SUCCESS, TaskStatus.FAILED, TaskStatus.SKIPPED]:
-            execution.end_time = datetime.utcnow()
+        if status == TaskStatus.RUNNING and execution.start_ns is None:
+            execution.start_ns = time.monotonic_ns()
+        elif status in (TaskStatus.SUCCESS, TaskStatus.FAILED, TaskStatus.SKIPPED):
+            execution.end_ns = time.monotonic_ns()
+
+
+class TaskEvent(BaseModel):
+    """Event emitted when a task reaches its final state during execution."""
+    
+    workflow_id: str
+    task_id: str
+    status: TaskStatus
+    result: Optional[AgentResponse] = None
+    error: Optional[str] = None
+
+
+# Execution of the workflow running in the current task. Agents read upstream
+# results through it by reference instead of receiving copies in their context.
+_CURRENT_EXECUTION: ContextVar[Optional[WorkflowExecution]] = ContextVar(
+    "genflow_current_execution", default=None
+)
+
+
+def get_task_result(task_id: str) -> Optional[AgentResponse]:
+    """
+    Get the result of a task in the workflow executing the caller.
+    
+    Returns ``None`` outside a workflow, for unknown or unfinished tasks, and
+    for results already released by ``execute_workflow_stream``.
+    """
+    execution = _CURRENT_EXECUTION.get()
+    if execution is None or task_id not in execution.task_executions:
+        return None
+    return execution.task_executions[task_id].result
+
+
+def _split_fused_result(task: TaskDefinition, result: AgentResponse) -> AgentResponse:
+    """
+    Split a fused task's successful response into a dict keyed by subtask ID.
+    
+    A response missing any subtask's section counts as failed, so the task
+    is retried like any other unsuccessful response.
+    """
+    subtask_ids = task.context.get("fused_subtasks")
+    if not subtask_ids or not result.success:
+        return result
+    
+    sections = _split_chain_output(str(result.result), subtask_ids)
+    missing = [subtask_id for subtask_id in subtask_ids if subtask_id not in sections]
+    if missing:
+        return AgentResponse(
+            success=False,
+            error=f"Fused task {task.id} response has no section for: {', '.join(missing)}",
+            metadata=result.metadata
+        )
+    return result.model_copy(update={"result": sections})
+
+
+def _task_fingerprint(task: TaskDefinition, task_context: Dict[str, Any], execution: WorkflowExecution) -> str:
+    """
+    Hash everything a task's result can depend on: agent, description, context and upstream results.
+    
+    Upstream tasks that were fingerprinted themselves contribute their
+    fingerprint instead of their result, so unchanged cached subgraphs are
+    recognised without serializing their outputs.
+    """
+    upstream_fingerprints = {}
+    upstream_results = {}
+    for dep in task.depends_on:
+        dep_execution = execution.task_executions[dep]
+        if dep_execution.fingerprint is not None:
+            upstream_fingerprints[dep] = dep_execution.fingerprint
+        elif dep_execution.result is not None:
+            upstream_results[dep] = dep_execution.result.result
+    
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(task.agent_id.encode())
+    digest.update(b"\0")
+    digest.update(task.task_description.encode())
+    digest.update(b"\0")
+    digest.update(json.dumps(
+        [task_context, upstream_fingerprints, upstream_results], sort_keys=True, default=str
+    ).encode())
+    return digest.hexdigest()
 
 
 class WorkflowEngine:
@@ -167,17 +467,26 @@ class WorkflowEngine:
     Integrates with Airflow through airflow-ai-bridge for production deployments.
     """
     
-    def __init__(self):
+    def __init__(self, store: Optional[StateStore] = None):
+        self._store = store
         self._agents: Dict[str, BaseAgent] = {}
         self._workflows: Dict[str, WorkflowDefinition] = {}
         self._executions: Dict[str, WorkflowExecution] = {}
         self._running_tasks: Set[str] = set()
+        self._result_cache: Dict[str, AgentResponse] = {}
+        self._task_listeners: Dict[str, Callable[[TaskEvent], None]] = {}
         
     def register_agent(self, agent: BaseAgent) -> None:
         """Register an agent with the workflow engine."""
         self._agents[agent.id] = agent
         logger.info(f"Registered agent {agent.id} with workflow engine")
     
+    def register_agents(self, agents: Iterable[BaseAgent]) -> None:
+        """Register several agents with the workflow engine at once."""
+        agents = list(agents)
+        self._agents.update((agent.id, agent) for agent in agents)
+        logger.info(f"Registered {len(agents)} agents with workflow engine")
+    
     def unregister_agent(self, agent_id: str) -> None:
         """Unregister an agent from the workflow engine."""
         if agent_id in self._agents:
@@ -202,7 +511,7 @@ class WorkflowEngine:
         execution = WorkflowExecution(
             workflow_id=workflow_id,
             status=WorkflowStatus.RUNNING,
-            start_time=datetime.utcnow(),
+            start_time=_utcnow(),
             execution_context=context or {}
         )
         
@@ -211,6 +520,8 @@ class WorkflowEngine:
             execution.task_executions[task.id] = TaskExecution(task_id=task.id)
         
         self._executions[workflow_id] = execution
+        await self._persist_execution(execution)
+        token = _CURRENT_EXECUTION.set(execution)
         
         try:
             await self._execute_workflow_tasks(workflow, execution)
@@ -226,134 +537,390 @@ class WorkflowEngine:
             logger.error(f"Workflow {workflow_id} execution failed: {e}")
             execution.status = WorkflowStatus.FAILED
         finally:
-            execution.end_time = datetime.utcnow()
+            _CURRENT_EXECUTION.reset(token)
+            execution.end_time = _utcnow()
         
+        await self._persist_execution(execution)
         logger.info(f"Workflow {workflow_id} completed with status: {execution.status}")
         return execution
     
+    async def _persist_execution(self, execution: WorkflowExecution) -> None:
+        """Write execution state to the configured store, if any."""
+        if self._store is None:
+            return
+        try:
+            await self._store.save_execution(execution)
+        except Exception as e:
+            logger.warning(f"Failed to persist execution of workflow {execution.workflow_id}: {e}")
+    
+    async def execute_workflow_stream(
+        self,
+        workflow_id: str,
+        context: Dict[str, Any] = None,
+        release_results: bool = False
+    ) -> AsyncIterator[TaskEvent]:
+        """
+        Execute a workflow, yielding an event as each task finishes.
+        
+        With ``release_results``, a task's result is dropped from the
+        execution state once all of its dependents have finished, so large
+        intermediate outputs are not held until the end of the run. The final
+        state is available from ``get_workflow_status`` afterwards.
+        """
+        if workflow_id not in self._workflows:
+            raise ValueError(f"Workflow {workflow_id} not found")
+        
+        workflow = self._workflows[workflow_id]
+        events: asyncio.Queue = asyncio.Queue()
+        self._task_listeners[workflow_id] = events.put_nowait
+        run = asyncio.create_task(self.execute_workflow(workflow_id, context))
+        run.add_done_callback(lambda _: events.put_nowait(None))
+        
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+                if release_results:
+                    self._release_consumed_results(workflow, self._executions[workflow_id], event.task_id)
+            await run
+        finally:
+            self._task_listeners.pop(workflow_id, None)
+            if not run.done():
+                run.cancel()
+    
+    def _notify_task_finished(self, execution: WorkflowExecution, task_id: str) -> None:
+        """Emit a task event to the workflow's stream listener, if any."""
+        listener = self._task_listeners.get(execution.workflow_id)
+        if listener:
+            task_execution = execution.get_task_execution(task_id)
+            listener(TaskEvent(
+                workflow_id=execution.workflow_id,
+                task_id=task_id,
+                status=task_execution.status,
+                result=task_execution.result,
+                error=task_execution.error
+            ))
+    
+    def _release_consumed_results(
+        self,
+        workflow: WorkflowDefinition,
+        execution: WorkflowExecution,
+        task_id: str
+    ) -> None:
+        """Drop results of the task's dependencies once all their dependents finished."""
+        finished = {TaskStatus.SUCCESS, TaskStatus.FAILED, TaskStatus.SKIPPED}
+        for dep in workflow.get_dependencies(task_id):
+            if all(
+                execution.get_task_execution(dependent).status in finished
+                for dependent in workflow.get_dependents(dep)
+            ):
+                execution.get_task_execution(dep).result = None
+    
     async def _execute_workflow_tasks(self, workflow: WorkflowDefinition, execution: WorkflowExecution) -> None:
-        """Execute all tasks in a workflow with proper dependency management."""
-        completed_tasks = set()
-        semaphore = asyncio.Semaphore(workflow.max_parallel_tasks)
-        
-        while len(completed_tasks) < len(workflow.tasks):
-            # Find ready tasks (all dependencies completed successfully)
-            ready_tasks = []
-            for task in workflow.tasks:
-                if (task.id not in completed_tasks and 
-                    task.id not in self._running_tasks and
-                    execution.get_task_execution(task.id).status == TaskStatus.PENDING):
+        """
+        Execute all tasks in a workflow with proper dependency management.
+        
+        Tasks run inside an ``asyncio.TaskGroup`` so that nothing is left
+        running once the workflow stops. With ``fail_fast`` set, the first
+        failed task aborts the group, cancelling in-flight agent calls on
+        sibling branches; those tasks are marked as skipped.
+        """
+        graph = workflow._graph()
+        completed_tasks: Set[str] = set()
+        scheduled: Set[str] = set()
+        pending: Set[asyncio.Task] = set()
+        
+        # Count unfinished dependencies; a task is ready when its count reaches zero
+        remaining_deps = dict(graph.indegree)
+        ready = deque(task_id for task_id in graph.order if remaining_deps[task_id] == 0)
+        
+        def finish(task_id: str) -> None:
+            """Record a finished task and release dependents it unblocks."""
+            completed_tasks.add(task_id)
+            self._running_tasks.discard(task_id)
+            self._notify_task_finished(execution, task_id)
+            
+            status = execution.get_task_execution(task_id).status
+            if workflow.fail_fast and status == TaskStatus.FAILED:
+                raise _WorkflowAborted(task_id)
+            
+            if status == TaskStatus.SUCCESS:
+                for dependent in graph.dependents[task_id]:
+                    remaining_deps[dependent] -= 1
+                    if remaining_deps[dependent] == 0:
+                        ready.append(dependent)
+        
+        try:
+            async with asyncio.TaskGroup() as group:
+                while len(completed_tasks) < len(workflow.tasks):
+                    # Start ready tasks up to the parallel limit, collapsing
+                    # same-agent chains into one call that takes a single slot
+                    while ready and len(pending) < workflow.max_parallel_tasks:
+                        task = graph.tasks[ready.popleft()]
+                        if (task.id in scheduled or
+                            execution.get_task_execution(task.id).status != TaskStatus.PENDING):
+                            continue
+                        
+                        # Complete cache hits in place, so unchanged subgraphs never dispatch;
+                        # cacheable tasks are never inside a chain, so each one is checked here
+                        if task.cacheable and task.agent_id in self._agents:
+                            cached = self._lookup_cached_result(workflow, task, execution)
+                            if cached is not None:
+                                scheduled.add(task.id)
+                                execution.update_task_status(task.id, TaskStatus.SUCCESS, cached)
+                                logger.info(f"Task {task.id} served from result cache")
+                                finish(task.id)
+                                continue
+                        
+                        chain = self._find_task_chain(workflow, task)
+                        if len(chain) > 1:
+                            task_coro = self._execute_task_chain(workflow, chain, execution)
+                        else:
+                            task_coro = self._execute_single_task(workflow, task, execution)
+                        scheduled.update(t.id for t in chain)
+                        pending.add(group.create_task(task_coro))
                     
-                    dependencies_met = all(
-                        dep in completed_tasks and 
-                        execution.get_task_execution(dep).status == TaskStatus.SUCCESS
-                        for dep in task.depends_on
-                    )
+                    if not pending:
+                        # No ready tasks and nothing running - check for failures
+                        failed_tasks = [
+                            t for t in execution.task_executions.values() 
+                            if t.status == TaskStatus.FAILED
+                        ]
+                        if failed_tasks:
+                            logger.error(f"Workflow blocked by failed tasks: {[t.task_id for t in failed_tasks]}")
+                        break
+                    
+                    # Wait for at least one running task to complete
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    
+                    # Update completed tasks
+                    for finished_task in done:
+                        finished = finished_task.result()
+                        task_ids = finished if isinstance(finished, list) else [finished]
+                        for task_id in task_ids:
+                            finish(task_id)
                     
-                    if dependencies_met:
-                        ready_tasks.append(task)
+                    await self._persist_execution(execution)
+        except* _WorkflowAborted as group_error:
+            failed_ids = [str(e) for e in group_error.exceptions]
+            logger.error(f"Workflow {workflow.id} aborted after task failure: {failed_ids}")
+            for task_id in scheduled - completed_tasks:
+                self._running_tasks.discard(task_id)
+                task_execution = execution.get_task_execution(task_id)
+                if task_execution.status in (TaskStatus.RUNNING, TaskStatus.RETRY, TaskStatus.PENDING):
+                    execution.update_task_status(task_id, TaskStatus.SKIPPED)
+                    self._notify_task_finished(execution, task_id)
+    
+    def _find_task_chain(self, workflow: WorkflowDefinition, head: TaskDefinition) -> List[TaskDefinition]:
+        """
+        Find the linear chain of tasks starting at ``head`` that can be sent
+        to its agent in a single call.
+        
+        Chaining is opt-in through the workflow's ``chain_tasks``. Only
+        agents whose class overrides ``BaseAgent.execute_chain`` get chains;
+        the default implementation would just run the steps one by one
+        without the engine's per-task handling. Agents configured as
+        ``batchable`` are left to the batch queue. A task joins the chain
+        when it is the only dependent of the previous task, depends on
+        nothing else, and runs on the same agent. Cacheable tasks are never
+        chained, so their results go through the result cache.
+        """
+        if not workflow.chain_tasks or head.cacheable:
+            return [head]
+        
+        agent = self._agents.get(head.agent_id)
+        chain_impl = getattr(type(agent), "execute_chain", None)
+        if chain_impl is None or chain_impl is BaseAgent.execute_chain:
+            return [head]
+        config = getattr(agent, "config", None)
+        if config is not None and config.batchable:
+            return [head]
+        
+        chain = [head]
+        current = head
+        while True:
+            dependents = workflow.get_dependents(current.id)
+            if len(dependents) != 1:
+                break
+            next_task = workflow.get_task(dependents[0])
+            if (next_task.agent_id != head.agent_id or next_task.depends_on != [current.id] or
+                next_task.cacheable):
+                break
+            chain.append(next_task)
+            current = next_task
+        return chain
+    
+    async def _execute_task_chain(
+        self,
+        workflow: WorkflowDefinition,
+        chain: List[TaskDefinition],
+        execution: WorkflowExecution
+    ) -> List[str]:
+        """
+        Execute a same-agent task chain with a single ``execute_chain`` call.
+        
+        Each step gets its own context. The call is bounded by the sum of the
+        steps' timeouts, since they run inside one request. Only the head is
+        running while the call is in flight; later steps start as their
+        results are taken. The first step without a successful result counts
+        the chain call as its first attempt and continues with regular
+        per-task retries; steps after it run individually as usual.
+        """
+        head = chain[0]
+        self._running_tasks.add(head.id)
+        execution.update_task_status(head.id, TaskStatus.RUNNING)
+        
+        agent = self._agents[head.agent_id]
+        contexts = {task.id: workflow._task_context(task.id, execution.execution_context) for task in chain}
+        steps = [(task.id, workflow._task_description(task.id, execution.execution_context)) for task in chain]
+        results: Dict[str, AgentResponse] = {}
+        error: Optional[str] = None
+        try:
+            results = await asyncio.wait_for(
+                agent.execute_chain(steps, contexts),
+                timeout=sum(task.timeout for task in chain)
+            )
+        except asyncio.TimeoutError:
+            error = f"Chain starting at {head.id} timed out"
+            logger.warning(error)
+        except Exception as e:
+            error = f"Chain starting at {head.id} failed: {e}"
+            logger.warning(error)
+        
+        finished = []
+        for index, task in enumerate(chain):
+            result = results.get(task.id)
+            if result is not None:
+                result = _split_fused_result(task, result)
+            if task is not head:
+                self._running_tasks.add(task.id)
+                execution.update_task_status(task.id, TaskStatus.RUNNING)
             
-            if not ready_tasks:
-                if not self._running_tasks:
-                    # No ready tasks and nothing running - check for failures
-                    failed_tasks = [
-                        t for t in execution.task_executions.values() 
-                        if t.status == TaskStatus.FAILED
-                    ]
-                    if failed_tasks:
-                        logger.error(f"Workflow blocked by failed tasks: {[t.task_id for t in failed_tasks]}")
-                        break
-                
-                # Wait for running tasks to complete
-                await asyncio.sleep(0.1)
+            if result is not None and result.success:
+                execution.update_task_status(task.id, TaskStatus.SUCCESS, result)
+                finished.append(task.id)
                 continue
             
-            # Start ready tasks
-            tasks_to_run = []
-            for task in ready_tasks:
-                task_coro = self._execute_single_task(workflow, task, execution, semaphore)
-                tasks_to_run.append(task_coro)
+            # The chain call was this task's first attempt
+            if result is None:
+                result = AgentResponse(success=False, error=error or f"Chain returned no result for task {task.id}")
+            task_execution = execution.get_task_execution(task.id)
+            if task_execution.attempts >= task.retry_count:
+                execution.update_task_status(task.id, TaskStatus.FAILED, result)
+                logger.error(f"Task {task.id} failed after {task.retry_count} attempts")
+                finished.append(task.id)
+                break
             
-            # Run tasks and wait for at least one to complete
-            if tasks_to_run:
-                done, pending = await asyncio.wait(tasks_to_run, return_when=asyncio.FIRST_COMPLETED)
-                
-                # Update completed tasks
-                for task_coro in done:
-                    try:
-                        task_id = await task_coro
-                        completed_tasks.add(task_id)
-                        self._running_tasks.discard(task_id)
-                    except Exception as e:
-                        logger.error(f"Task execution error: {e}")
-                
-                # Continue with pending tasks
-                for task_coro in pending:
-                    task_coro.cancel()
+            task_execution.attempts += 1
+            execution.update_task_status(task.id, TaskStatus.RETRY)
+            logger.warning(f"Task {task.id} failed in chain, retrying ({task_execution.attempts}/{task.retry_count})")
+            
+            # Later chain results built on the failed step, so rerun those steps individually
+            for remaining in chain[index:]:
+                finished.append(await self._execute_single_task(workflow, remaining, execution))
+                if execution.get_task_execution(remaining.id).status != TaskStatus.SUCCESS:
+                    break
+            break
+        
+        logger.info(f"Chain starting at {head.id} finished {len(finished)}/{len(chain)} tasks")
+        return finished
+    
+    def _lookup_cached_result(
+        self,
+        workflow: WorkflowDefinition,
+        task: TaskDefinition,
+        execution: WorkflowExecution
+    ) -> Optional[AgentResponse]:
+        """Fingerprint a cacheable task and return the cached result for it, if any."""
+        task_execution = execution.get_task_execution(task.id)
+        if task_execution.fingerprint is None:
+            task_context = workflow._task_context(task.id, execution.execution_context)
+            task_execution.fingerprint = _task_fingerprint(task, task_context, execution)
+        return self._result_cache.get(task_execution.fingerprint)
     
     async def _execute_single_task(
         self, 
         workflow: WorkflowDefinition, 
         task: TaskDefinition, 
-        execution: WorkflowExecution,
-        semaphore: asyncio.Semaphore
+        execution: WorkflowExecution
     ) -> str:
         """Execute a single task."""
-        async with semaphore:
-            self._running_tasks.add(task.id)
-            task_execution = execution.get_task_execution(task.id)
+        self._running_tasks.add(task.id)
+        task_execution = execution.get_task_execution(task.id)
+        
+        try:
+            # Find the agent
+            agent = self._agents.get(task.agent_id)
+            if not agent:
+                raise ValueError(f"Agent {task.agent_id} not found")
+            
+            # Update status to running
+            execution.update_task_status(task.id, TaskStatus.RUNNING)
+            
+            # Prepare task context
+            task_context = workflow._task_context(task.id, execution.execution_context)
             
+            # Reuse the result of an identical earlier run
+            if task.cacheable:
+                cached = self._lookup_cached_result(workflow, task, execution)
+                if cached is not None:
+                    execution.update_task_status(task.id, TaskStatus.SUCCESS, cached)
+                    logger.info(f"Task {task.id} served from result cache")
+                    return task.id
+            
+            # Execute with timeout, retrying unsuccessful responses in place
+            description = workflow._task_description(task.id, execution.execution_context)
             try:
-                # Find the agent
-                agent = self._agents.get(task.agent_id)
-                if not agent:
-                    raise ValueError(f"Agent {task.agent_id} not found")
-                
-                # Update status to running
-                execution.update_task_status(task.id, TaskStatus.RUNNING)
-                
-                # Prepare task context
-                task_context = {**workflow.global_context, **task.context, **execution.execution_context}
-                
-                # Execute with timeout
-                try:
+                while True:
                     result = await asyncio.wait_for(
-                        agent.execute(task.task_description, task_context),
+                        agent.execute(description, task_context),
                         timeout=task.timeout
                     )
+                    result = _split_fused_result(task, result)
                     
                     if result.success:
                         execution.update_task_status(task.id, TaskStatus.SUCCESS, result)
                         logger.info(f"Task {task.id} completed successfully")
-                    else:
-                        if task_execution.attempts < task.retry_count:
-                            task_execution.attempts += 1
-                            execution.update_task_status(task.id, TaskStatus.RETRY)
-                            logger.warning(f"Task {task.id} failed, retrying ({task_execution.attempts}/{task.retry_count})")
-                            # Recursive retry
-                            return await self._execute_single_task(workflow, task, execution, semaphore)
-                        else:
-                            execution.update_task_status(task.id, TaskStatus.FAILED, result)
-                            logger.error(f"Task {task.id} failed after {task.retry_count} attempts")
-                
-                except asyncio.TimeoutError:
-                    error_msg = f"Task {task.id} timed out after {task.timeout}s"
-                    logger.error(error_msg)
-                    result = AgentResponse(success=False, error=error_msg)
-                    execution.update_task_status(task.id, TaskStatus.FAILED, result)
-                
-            except Exception as e:
-                error_msg = f"Task {task.id} execution error: {e}"
+                        if task.cacheable:
+                            self._result_cache[task_execution.fingerprint] = result
+                        break
+                    
+                    if task_execution.attempts >= task.retry_count:
+                        execution.update_task_status(task.id, TaskStatus.FAILED, result)
+                        logger.error(f"Task {task.id} failed after {task.retry_count} attempts")
+                        break
+                    
+                    task_execution.attempts += 1
+                    execution.update_task_status(task.id, TaskStatus.RETRY)
+                    logger.warning(f"Task {task.id} failed, retrying ({task_execution.attempts}/{task.retry_count})")
+                    execution.update_task_status(task.id, TaskStatus.RUNNING)
+            
+            except asyncio.TimeoutError:
+                error_msg = f"Task {task.id} timed out after {task.timeout}s"
                 logger.error(error_msg)
                 result = AgentResponse(success=False, error=error_msg)
                 execution.update_task_status(task.id, TaskStatus.FAILED, result)
             
-            return task.id
+        except Exception as e:
+            error_msg = f"Task {task.id} execution error: {e}"
+            logger.error(error_msg)
+            result = AgentResponse(success=False, error=error_msg)
+            execution.update_task_status(task.id, TaskStatus.FAILED, result)
+        
+        return task.id
     
     def get_workflow_status(self, workflow_id: str) -> Optional[WorkflowExecution]:
         """Get the execution status of a workflow."""
         return self._executions.get(workflow_id)
     
+    async def load_workflow_status(self, workflow_id: str) -> Optional[WorkflowExecution]:
+        """Get the execution status of a workflow, falling back to the state store."""
+        execution = self._executions.get(workflow_id)
+        if execution is None and self._store is not None:
+            execution = await self._store.load_execution(workflow_id)
+            if execution is not None:
+                self._executions[workflow_id] = execution
+        return execution
+    
     def list_workflows(self) -> List[str]:
         """List all registered workflow IDs."""
         return list(self._workflows.keys())
@@ -362,12 +929,17 @@ class WorkflowEngine:
         """List all registered agent IDs."""
         return list(self._agents.keys())
     
+    def clear_result_cache(self) -> None:
+        """Forget cached results of cacheable tasks."""
+        self._result_cache.clear()
+    
     async def cancel_workflow(self, workflow_id: str) -> bool:
         """Cancel a running workflow."""
         execution = self._executions.get(workflow_id)
         if execution and execution.status == WorkflowStatus.RUNNING:
             execution.status = WorkflowStatus.CANCELLED
-            execution.end_time = datetime.utcnow()
+            execution.end_time = _utcnow()
+            await self._persist_execution(execution)
             logger.info(f"Cancelled workflow {workflow_id}")
             return True
         return False
@@ -397,8 +969,41 @@ class WorkflowBuilder:
             **kwargs
         )
         self.workflow.tasks.append(task)
+        self.workflow.invalidate_graph()
         return self
     
+    def add_fused_task(
+        self,
+        task_id: str,
+        agent_id: str,
+        subtasks: Dict[str, str],
+        depends_on: List[str] = None,
+        **kwargs: Any
+    ) -> "WorkflowBuilder":
+        """
+        Add a single task that performs several independent subtasks at once.
+        
+        Subtasks that query the same external system are answered in one
+        agent call instead of one call each. The agent answers each subtask
+        in a section headed ``### <subtask id>``, and the task's result is a
+        dict mapping each subtask ID to its section.
+        """
+        description = _build_sectioned_prompt(
+            "Perform all of the following analyses in a single pass, gathering "
+            "the data they share only once. Start the answer to each analysis "
+            "with a line containing only '### <analysis id>'.",
+            subtasks.items()
+        )
+        context = {**kwargs.pop("context", {}), "fused_subtasks": list(subtasks)}
+        return self.add_task(
+            task_id,
+            agent_id,
+            description,
+            depends_on=depends_on,
+            context=context,
+            **kwargs
+        )
+    
     def set_global_context(self, context: Dict[str, Any]) -> "WorkflowBuilder":
         """Set global context for the workflow."""
         self.workflow.global_context = context
@@ -409,8 +1014,29 @@ class WorkflowBuilder:
         self.workflow.max_parallel_tasks = max_parallel
         return self
     
+    def set_chain_tasks(self, chain_tasks: bool = True) -> "WorkflowBuilder":
+        """
+        Send runs of dependent same-agent tasks to their agent in one call.
+        
+        The agent answers every step in a single response, split on
+        ``### <task id>`` headers; steps whose section is missing are retried
+        on their own.
+        """
+        self.workflow.chain_tasks = chain_tasks
+        return self
+    
+    def set_fail_fast(self, fail_fast: bool = True) -> "WorkflowBuilder":
+        """Cancel running tasks as soon as any task fails."""
+        self.workflow.fail_fast = fail_fast
+        return self
+    
     def build(self) -> WorkflowDefinition:
-        """Build and return the workflow definition."""
+        """
+        Build and return the workflow definition.
+        
+        ``{name}`` placeholders in task descriptions are left in place; they
+        are filled from the global and task context once per task graph.
+        """
         if not self.workflow.validate_dependencies():
             raise ValueError("Invalid workflow dependencies")
         return self.workflow
\ No newline at end of file
@@ -11,10 +11,20 @@ from genflow.communication import MessageBus
 from genflow.workflow import WorkflowEngine
 
 
-@pytest.fixture
-def event_loop():
-    """Create an event loop for async tests."""
-    loop = asyncio.new_event_loop()
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    """Use uvloop for async tests when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.DefaultEventLoopPolicy()
+    return uvloop.EventLoopPolicy()
+
+
+@pytest.fixture(scope="session")
+def event_loop(event_loop_policy):
+    """Create one event loop shared by all async tests."""
+    loop = event_loop_policy.new_event_loop()
     yield loop
     loop.close()
 
@@ -3,8 +3,12 @@ Tests for GenFlow agent system.
 """
 
 import asyncio
+import functools
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from collections import deque
+from unittest.mock import AsyncMock
+
+from pydantic import ValidationError
 
 from genflow.agents import (
     Agent,
@@ -13,108 +17,159 @@ from genflow.agents import (
     AgentMessage,
     AgentResponse,
     BaseAgent,
+    MCPServerSpec,
     WorkflowAgent,
+    _get_max_mcp,
+    _get_mcp_spawn_limit,
+    _resolve_model,
+    _split_chain_output,
+    close_http_client,
 )
 
 
+# Validated once; handler tests only vary routing fields, so they copy it
+_MESSAGE = AgentMessage(sender="sender", recipient="agent", content="test message")
+
+
+class StubAIAgent:
+    """Stand-in for a pydantic_ai Agent that records how it was built."""
+    
+    def __init__(self, model, system_prompt=""):
+        self.model = model
+        self.system_prompt = system_prompt
+
+
+@pytest.fixture
+def stub_ai_agents(monkeypatch):
+    """Build agents with stub AI agents instead of real models, in an isolated pool."""
+    monkeypatch.setattr("genflow.agents._AI_AGENT_POOL", {})
+    monkeypatch.setattr("genflow.agents._get_pydantic_agent_cls", lambda: StubAIAgent)
+    monkeypatch.setattr("genflow.agents._resolve_model", lambda model: model)
+
+
+@functools.cache
+def _config(name: str, **kwargs) -> AgentConfig:
+    """Build a validated AgentConfig once per distinct set of (hashable) arguments."""
+    return AgentConfig(name=name, **kwargs)
+
+
 class TestAgentConfig:
     """Test AgentConfig model."""
     
-    def test_default_config(self):
-        """Test creating agent config with defaults."""
-        config = AgentConfig(name="test_agent")
-        
-        assert config.name == "test_agent"
-        assert config.description == ""
-        assert config.model == "gpt-4o"
-        assert config.system_prompt == ""
-        assert config.mcp_servers == []
-        assert config.max_retries == 3
-        assert config.timeout == 300.0
-    
-    def test_custom_config(self):
-        """Test creating agent config with custom values."""
-        mcp_servers = [{"command": "mcp-server-github"}]
-        config = AgentConfig(
-            name="github_agent",
-            description="Agent with GitHub access",
-            model="gpt-4",
-            system_prompt="You are a GitHub agent",
-            mcp_servers=mcp_servers,
-            max_retries=5,
-            timeout=600.0
+    @pytest.mark.parametrize("kwargs,expected", [
+        (
+            {"name": "test_agent"},
+            {
+                "name": "test_agent",
+                "description": "",
+                "model": "gpt-4o",
+                "system_prompt": "",
+                "mcp_servers": (),
+                "max_retries": 3,
+                "timeout": 300.0
+            }
+        ),
+        (
+            {
+                "name": "github_agent",
+                "description": "Agent with GitHub access",
+                "model": "gpt-4",
+                "system_prompt": "You are a GitHub agent",
+                "mcp_servers": [{"command": "mcp-server-github"}],
+                "max_retries": 5,
+                "timeout": 600.0
+            },
+            {
+                "name": "github_agent",
+                "description": "Agent with GitHub access",
+                "model": "gpt-4",
+                "system_prompt": "You are a GitHub agent",
+                "mcp_servers": (MCPServerSpec(command="mcp-server-github"),),
+                "max_retries": 5,
+                "timeout": 600.0
+            }
         )
-        
-        assert config.name == "github_agent"
-        assert config.description == "Agent with GitHub access"
-        assert config.model == "gpt-4"
-        assert config.system_prompt == "You are a GitHub agent"
-        assert config.mcp_servers == mcp_servers
-        assert config.max_retries == 5
-        assert config.timeout == 600.0
+    ], ids=["defaults", "custom"])
+    def test_config_values(self, kwargs, expected):
+        """Test creating agent config with default and custom values."""
+        config = AgentConfig(**kwargs)
+        
+        for field, value in expected.items():
+            assert getattr(config, field) == value
+    
+    def test_mcp_server_spec_round_trip(self):
+        """Test dictionary server configurations are parsed into hashable specs."""
+        server = {"command": "mcp-server-filesystem", "args": ["--root", "/tmp"], "env": {"DEBUG": "1"}}
+        config = AgentConfig(name="test", mcp_servers=[server])
+        
+        spec = config.mcp_servers[0]
+        assert spec == MCPServerSpec(command="mcp-server-filesystem", args=("--root", "/tmp"), env=(("DEBUG", "1"),))
+        assert spec.to_dict() == server
+        assert hash(config.mcp_servers) == hash(AgentConfig(name="other", mcp_servers=[server]).mcp_servers)
 
 
 class TestAgentMessage:
     """Test AgentMessage model."""
     
-    def test_default_message(self):
-        """Test creating message with defaults."""
-        message = AgentMessage(
-            sender="agent1",
-            recipient="agent2",
-            content="Hello"
+    @pytest.mark.parametrize("kwargs,expected", [
+        ({}, {"message_type": "general", "metadata": {}}),
+        (
+            {"message_type": "task", "metadata": {"priority": "high"}},
+            {"message_type": "task", "metadata": {"priority": "high"}}
         )
+    ], ids=["defaults", "custom"])
+    def test_message_values(self, kwargs, expected):
+        """Test creating messages with default and custom values."""
+        message = AgentMessage(sender="agent1", recipient="agent2", content="Hello", **kwargs)
         
         assert message.sender == "agent1"
         assert message.recipient == "agent2"
         assert message.content == "Hello"
-        assert message.message_type == "general"
-        assert message.metadata == {}
         assert message.id is not None
+        for field, value in expected.items():
+            assert getattr(message, field) == value
     
-    def test_custom_message(self):
-        """Test creating message with custom values."""
-        metadata = {"priority": "high"}
-        message = AgentMessage(
-            sender="agent1",
-            recipient="agent2", 
-            content="Urgent task",
-            message_type="task",
-            metadata=metadata
-        )
+    def test_message_ids_are_unique(self):
+        """Test generated message IDs do not repeat."""
+        ids = {AgentMessage(sender="a", recipient="b", content="c").id for _ in range(100)}
         
-        assert message.message_type == "task"
-        assert message.metadata == metadata
+        assert len(ids) == 100
+    
+    def test_message_is_immutable(self):
+        """Test messages cannot be modified after creation."""
+        message = AgentMessage(sender="agent1", recipient="agent2", content="Hello")
+        
+        with pytest.raises(ValidationError):
+            message.recipient = "agent3"
 
 
 class TestAgentResponse:
     """Test AgentResponse model."""
     
-    def test_success_response(self):
-        """Test creating success response."""
-        response = AgentResponse(
-            success=True,
-            result="Task completed",
-            metadata={"duration": 5.2}
-        )
-        
-        assert response.success is True
-        assert response.result == "Task completed"
-        assert response.error is None
-        assert response.metadata == {"duration": 5.2}
-    
-    def test_error_response(self):
-        """Test creating error response."""
-        response = AgentResponse(
-            success=False,
-            error="Task failed",
-            metadata={"attempt": 2}
+    @pytest.mark.parametrize("kwargs,expected", [
+        (
+            {"success": True, "result": "Task completed", "metadata": {"duration": 5.2}},
+            {"success": True, "result": "Task completed", "error": None, "metadata": {"duration": 5.2}}
+        ),
+        (
+            {"success": False, "error": "Task failed", "metadata": {"attempt": 2}},
+            {"success": False, "result": None, "error": "Task failed", "metadata": {"attempt": 2}}
         )
+    ], ids=["success", "error"])
+    def test_response_values(self, kwargs, expected):
+        """Test creating success and error responses."""
+        response = AgentResponse(**kwargs)
         
-        assert response.success is False
-        assert response.result is None
-        assert response.error == "Task failed"
-        assert response.metadata == {"attempt": 2}
+        for field, value in expected.items():
+            assert getattr(response, field) == value
+
+
+def _assert_new_agent(agent: BaseAgent, name: str) -> None:
+    """Check the state every freshly constructed agent starts in."""
+    assert agent.config.name == name
+    assert agent.id.startswith(f"{name}_")
+    assert not agent.is_running()
+    assert len(agent._message_handlers) == 0
 
 
 class MockAgent(BaseAgent):
@@ -122,7 +177,8 @@ class MockAgent(BaseAgent):
     
     def __init__(self, config: AgentConfig):
         super().__init__(config)
-        self.executed_tasks = []
+        # Bounded so repeated or looped runs do not keep every task alive
+        self.executed_tasks = deque(maxlen=16)
     
     async def execute(self, task: str, context=None) -> AgentResponse:
         """Mock execute method."""
@@ -137,10 +193,10 @@ class MockAgent(BaseAgent):
 class TestBaseAgent:
     """Test BaseAgent functionality."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def agent_config(self):
-        """Create test agent config."""
-        return AgentConfig(name="test_agent")
+        """Create test agent config; configs are frozen, so one is shared."""
+        return _config("test_agent")
     
     @pytest.fixture
     def mock_agent(self, agent_config):
@@ -149,24 +205,24 @@ class TestBaseAgent:
     
     def test_agent_initialization(self, mock_agent):
         """Test agent initialization."""
-        assert mock_agent.config.name == "test_agent"
-        assert mock_agent.id.startswith("test_agent_")
-        assert not mock_agent.is_running()
-        assert len(mock_agent._message_handlers) == 0
+        _assert_new_agent(mock_agent, "test_agent")
     
     @pytest.mark.asyncio
-    async def test_agent_lifecycle(self, mock_agent):
-        """Test agent start/stop lifecycle."""
+    @pytest.mark.parametrize("agent_class", [MockAgent, Agent, WorkflowAgent])
+    async def test_agent_lifecycle(self, agent_config, agent_class):
+        """Test agent start/stop lifecycle for each agent type."""
+        agent = agent_class(agent_config)
+        
         # Initially not running
-        assert not mock_agent.is_running()
+        assert not agent.is_running()
         
         # Start agent
-        await mock_agent.start()
-        assert mock_agent.is_running()
+        await agent.start()
+        assert agent.is_running()
         
         # Stop agent
-        await mock_agent.stop()
-        assert not mock_agent.is_running()
+        await agent.stop()
+        assert not agent.is_running()
     
     @pytest.mark.asyncio
     async def test_execute_task(self, mock_agent):
@@ -178,7 +234,7 @@ class TestBaseAgent:
         
         assert response.success is True
         assert response.result == "Executed: Test task"
-        assert mock_agent.executed_tasks == [(task, context)]
+        assert list(mock_agent.executed_tasks) == [(task, context)]
     
     def test_message_handler_registration(self, mock_agent):
         """Test message handler registration."""
@@ -192,32 +248,27 @@ class TestBaseAgent:
     @pytest.mark.asyncio
     async def test_handle_message_with_handler(self, mock_agent):
         """Test message handling with registered handler."""
-        handler = AsyncMock(return_value=AgentResponse(success=True, result="handled"))
+        calls = []
+        
+        async def handler(message):
+            calls.append(message)
+            return AgentResponse(success=True, result="handled")
+        
         mock_agent.register_message_handler("test", handler)
         
-        message = AgentMessage(
-            sender="sender",
-            recipient=mock_agent.id,
-            content="test message",
-            message_type="test"
-        )
+        message = _MESSAGE.model_copy(update={"recipient": mock_agent.id, "message_type": "test"})
         
         response = await mock_agent.handle_message(message)
         
         assert response is not None
         assert response.success is True
         assert response.result == "handled"
-        handler.assert_called_once_with(message)
+        assert calls == [message]
     
     @pytest.mark.asyncio
     async def test_handle_message_without_handler(self, mock_agent):
         """Test message handling without registered handler."""
-        message = AgentMessage(
-            sender="sender",
-            recipient=mock_agent.id,
-            content="test message",
-            message_type="unknown"
-        )
+        message = _MESSAGE.model_copy(update={"recipient": mock_agent.id, "message_type": "unknown"})
         
         response = await mock_agent.handle_message(message)
         
@@ -227,10 +278,10 @@ class TestBaseAgent:
 class TestAgent:
     """Test standard Agent implementation."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def agent_config(self):
-        """Create test agent config."""
-        return AgentConfig(name="standard_agent")
+        """Create test agent config; configs are frozen, so one is shared."""
+        return _config("standard_agent")
     
     @pytest.fixture
     def agent(self, agent_config):
@@ -239,9 +290,10 @@ class TestAgent:
     
     def test_agent_initialization_without_mcp(self, agent):
         """Test agent initialization without MCP servers."""
+        _assert_new_agent(agent, "standard_agent")
         assert agent._ai_agent is None
     
-    def test_agent_initialization_with_mcp(self):
+    def test_agent_initialization_with_mcp(self, stub_ai_agents):
         """Test agent initialization with MCP servers."""
         config = AgentConfig(
             name="mcp_agent",
@@ -249,7 +301,105 @@ class TestAgent:
         )
         agent = Agent(config)
         
-        assert agent._ai_agent is not None
+        assert isinstance(agent._ai_agent, StubAIAgent)
+        assert agent._ai_agent.model == "gpt-4o"
+    
+    def test_agents_with_same_config_share_ai_agent(self):
+        """Test the underlying AI agent is pooled per configuration."""
+        servers = [{"command": "mcp-server-github"}]
+        first = Agent(AgentConfig(name="first", model="test", mcp_servers=servers))
+        second = Agent(AgentConfig(name="second", model="test", mcp_servers=servers))
+        other = Agent(AgentConfig(name="other", model="test", system_prompt="Other", mcp_servers=servers))
+        
+        assert first._ai_agent is second._ai_agent
+        assert first._ai_agent is not other._ai_agent
+    
+    @pytest.mark.asyncio
+    async def test_openai_models_share_http_client(self, monkeypatch):
+        """Test OpenAI models reuse one pooled HTTP client."""
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        first = _resolve_model("gpt-4o")
+        second = _resolve_model("openai:gpt-4o-mini")
+        
+        assert first.client._client is second.client._client
+        assert _resolve_model("test") == "test"
+        
+        await close_http_client()
+        assert first.client._client.is_closed
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_starts_register_mcp_tools_once(self, monkeypatch):
+        """Test agents sharing an MCP config register its tools only once."""
+        registrations = []
+        
+        async def register_mcp_tools(ai_agent, mcp_servers):
+            registrations.append(mcp_servers)
+            await asyncio.sleep(0)
+        
+        monkeypatch.setattr("genflow.agents._get_register_mcp_tools", lambda: register_mcp_tools)
+        servers = [{"command": "mcp-server-registration-test"}]
+        agents = [
+            Agent(AgentConfig(name=f"agent{i}", model="test", mcp_servers=servers))
+            for i in range(3)
+        ]
+        
+        await asyncio.gather(*(agent.start() for agent in agents))
+        
+        assert registrations == [servers]
+        assert all(agent.is_running() for agent in agents)
+    
+    @pytest.mark.asyncio
+    async def test_execute_registers_mcp_tools_without_start(self, monkeypatch):
+        """Test an agent executed without start() still registers its MCP tools, once."""
+        registrations = []
+        
+        async def register_mcp_tools(ai_agent, mcp_servers):
+            registrations.append(mcp_servers)
+        
+        monkeypatch.setattr("genflow.agents._get_register_mcp_tools", lambda: register_mcp_tools)
+        servers = [{"command": "mcp-server-lazy-registration-test"}]
+        agent = Agent(AgentConfig(name="lazy", model="test", mcp_servers=servers))
+        
+        first = await agent.execute("first task")
+        second = await agent.execute("second task")
+        
+        assert first.success and second.success
+        assert registrations == [servers]
+    
+    @pytest.mark.parametrize("value,expected", [
+        (None, 4),
+        ("2", 2),
+        ("many", 4),
+        ("0", 4),
+    ])
+    def test_mcp_spawn_limit_from_environment(self, monkeypatch, value, expected):
+        """Test GENFLOW_MAX_MCP is read on first use, falling back to the default when invalid."""
+        if value is None:
+            monkeypatch.delenv("GENFLOW_MAX_MCP", raising=False)
+        else:
+            monkeypatch.setenv("GENFLOW_MAX_MCP", value)
+        _get_max_mcp.cache_clear()
+        try:
+            assert _get_max_mcp() == expected
+        finally:
+            _get_max_mcp.cache_clear()
+    
+    def test_mcp_spawn_limit_per_event_loop(self):
+        """Test each event loop gets its own spawn semaphore, so contention in one loop does not bind the next."""
+        async def contend():
+            limit = _get_mcp_spawn_limit()
+            
+            async def hold():
+                async with limit:
+                    await asyncio.sleep(0)
+            
+            await asyncio.gather(*(hold() for _ in range(_get_max_mcp() + 1)))
+            return limit
+        
+        first = asyncio.run(contend())
+        second = asyncio.run(contend())
+        
+        assert first is not second
     
     @pytest.mark.asyncio
     async def test_execute_simple(self, agent):
@@ -262,13 +412,56 @@ class TestAgent:
         assert response.metadata["execution_type"] == "simple"
 
 
+    @pytest.mark.asyncio
+    async def test_execute_chain_simple(self, agent):
+        """Test chain execution falls back to per-task execution without AI agent."""
+        results = await agent.execute_chain([("step1", "first task"), ("step2", "second task")])
+        
+        assert list(results) == ["step1", "step2"]
+        assert all(response.success for response in results.values())
+        assert "second task" in results["step2"].result
+    
+    @pytest.mark.asyncio
+    async def test_execute_chain_failure_keeps_error(self, stub_ai_agents):
+        """Test a failed chain run reports its error on every step."""
+        agent = Agent(AgentConfig(name="failing_chain", model="test"))
+        agent._ai_agent = AsyncMock()
+        agent._ai_agent.run.side_effect = RuntimeError("provider unavailable")
+        
+        results = await agent.execute_chain([("step1", "first task"), ("step2", "second task")])
+        
+        assert list(results) == ["step1", "step2"]
+        assert all(not response.success for response in results.values())
+        assert all(response.error == "provider unavailable" for response in results.values())
+    
+    @pytest.mark.asyncio
+    async def test_session_scopes_message_history(self, agent):
+        """Test a session replaces the context history while active."""
+        context = {"history": ["previous"]}
+        
+        async with agent.session("wf1") as session:
+            assert session.id == "wf1"
+            assert agent._message_history(context) is session.message_history
+        
+        assert agent._session is None
+        assert agent._message_history(context) == ["previous"]
+    
+    def test_split_chain_output(self):
+        """Test splitting a chained response into per-task sections."""
+        output = "### step1\nfirst result\n### step2\nsecond\nresult"
+        
+        sections = _split_chain_output(output, ["step1", "step2", "step3"])
+        
+        assert sections == {"step1": "first result", "step2": "second\nresult"}
+
+
 class TestWorkflowAgent:
     """Test WorkflowAgent implementation."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def workflow_agent_config(self):
-        """Create workflow agent config."""
-        return AgentConfig(name="workflow_manager")
+        """Create workflow agent config; configs are frozen, so one is shared."""
+        return _config("workflow_manager")
     
     @pytest.fixture  
     def workflow_agent(self, workflow_agent_config):
@@ -277,7 +470,7 @@ class TestWorkflowAgent:
     
     def test_workflow_agent_initialization(self, workflow_agent):
         """Test workflow agent initialization."""
-        assert workflow_agent.config.name == "workflow_manager"
+        _assert_new_agent(workflow_agent, "workflow_manager")
         assert "workflow management agent" in workflow_agent.config.system_prompt.lower()
         assert len(workflow_agent._managed_workflows) == 0
     
@@ -306,19 +499,18 @@ class TestWorkflowAgent:
     def test_register_workflow(self, workflow_agent):
         """Test workflow registration."""
         workflow_id = "test_workflow"
-        mock_workflow = MagicMock()
+        mock_workflow = object()
         
         workflow_agent.register_workflow(workflow_id, mock_workflow)
         
         assert workflow_id in workflow_agent._managed_workflows
-        assert workflow_agent._managed_workflows[workflow_id] == mock_workflow
+        assert workflow_agent._managed_workflows[workflow_id] is mock_workflow
     
     def test_get_managed_workflows(self, workflow_agent):
         """Test getting managed workflows."""
         workflow_ids = ["wf1", "wf2", "wf3"]
         
-        for wf_id in workflow_ids:
-            workflow_agent.register_workflow(wf_id, MagicMock())
+        workflow_agent.register_workflows({wf_id: object() for wf_id in workflow_ids})
         
         managed = workflow_agent.get_managed_workflows()
         
@@ -328,45 +520,37 @@ class TestWorkflowAgent:
 class TestAgentFactory:
     """Test AgentFactory functionality."""
     
-    def test_create_standard_agent(self):
-        """Test creating standard agent."""
-        agent = AgentFactory.create_agent("standard", "test_agent", description="Test agent")
-        
-        assert isinstance(agent, Agent)
-        assert agent.config.name == "test_agent"
-        assert agent.config.description == "Test agent"
-    
-    def test_create_workflow_agent(self):
-        """Test creating workflow agent."""
-        agent = AgentFactory.create_agent("workflow", "workflow_agent")
-        
-        assert isinstance(agent, WorkflowAgent)
-        assert agent.config.name == "workflow_agent"
-    
     def test_create_unknown_agent_type(self):
         """Test creating unknown agent type raises error."""
         with pytest.raises(ValueError, match="Unknown agent type"):
             AgentFactory.create_agent("unknown", "test")
     
-    def test_create_github_agent(self):
-        """Test creating GitHub agent."""
-        agent = AgentFactory.create_github_agent("github_bot")
+    @pytest.mark.parametrize("create,agent_class,name,servers", [
+        (lambda: AgentFactory.create_agent("standard", "test_agent"), Agent, "test_agent", ()),
+        (lambda: AgentFactory.create_agent("workflow", "workflow_agent"), WorkflowAgent, "workflow_agent", ()),
+        (
+            lambda: AgentFactory.create_github_agent("github_bot"),
+            Agent,
+            "github_bot",
+            (MCPServerSpec(command="mcp-server-github"),)
+        ),
+        (
+            lambda: AgentFactory.create_filesystem_agent("file_agent", root_path="/custom/path"),
+            Agent,
+            "file_agent",
+            (MCPServerSpec(command="mcp-server-filesystem", args=("--root", "/custom/path")),)
+        )
+    ], ids=["standard", "workflow", "github", "filesystem"])
+    def test_create_agent(self, stub_ai_agents, create, agent_class, name, servers):
+        """Test each factory method builds the right agent type and MCP servers."""
+        agent = create()
         
-        assert isinstance(agent, Agent)
-        assert agent.config.name == "github_bot"
-        assert len(agent.config.mcp_servers) == 1
-        assert agent.config.mcp_servers[0]["command"] == "mcp-server-github"
+        assert isinstance(agent, agent_class)
+        assert agent.config.name == name
+        assert agent.config.mcp_servers == servers
     
-    def test_create_filesystem_agent(self):
-        """Test creating filesystem agent."""
-        root_path = "/custom/path"
-        agent = AgentFactory.create_filesystem_agent("file_agent", root_path=root_path)
-        
-        assert isinstance(agent, Agent)
-        assert agent.config.name == "file_agent"
-        assert len(agent.config.mcp_servers) == 1
+    def test_create_agent_passes_config_options(self):
+        """Test extra factory arguments end up in the agent config."""
+        agent = AgentFactory.create_agent("standard", "test_agent", description="Test agent")
         
-        mcp_config = agent.config.mcp_servers[0]
-        assert mcp_config["command"] == "mcp-server-filesystem"
-        assert "--root" in mcp_config["args"]
-        assert root_path in mcp_config["args"]
\ No newline at end of file
+        assert agent.config.description == "Test agent"
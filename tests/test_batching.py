@@ -0,0 +1,94 @@
+"""
+Tests for GenFlow request batching.
+"""
+
+import asyncio
+import pytest
+
+from genflow.batching import LLMBatchQueue
+
+
+class FakeAIAgent:
+    """AI agent stand-in that records the prompts it runs."""
+    
+    def __init__(self, fail: bool = False):
+        self.prompts = []
+        self.fail = fail
+    
+    async def run(self, prompt, message_history=None):
+        self.prompts.append(prompt)
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return f"result: {prompt}"
+
+
+class TestLLMBatchQueue:
+    """Test LLMBatchQueue functionality."""
+    
+    @pytest.mark.asyncio
+    async def test_submit_returns_result(self):
+        """Test a single request is run and its result returned."""
+        queue = LLMBatchQueue(flush_ms=1)
+        ai_agent = FakeAIAgent()
+        
+        result = await queue.submit(ai_agent, "hello")
+        await queue.stop()
+        
+        assert result == "result: hello"
+        assert ai_agent.prompts == ["hello"]
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_batch(self):
+        """Test requests within the flush window are dispatched together."""
+        queue = LLMBatchQueue(flush_ms=50)
+        ai_agent = FakeAIAgent()
+        
+        results = await asyncio.gather(
+            queue.submit(ai_agent, "first"),
+            queue.submit(ai_agent, "second"),
+            queue.submit(ai_agent, "first")
+        )
+        await queue.stop()
+        
+        assert results == ["result: first", "result: second", "result: first"]
+        assert sorted(ai_agent.prompts) == ["first", "second"]
+        assert queue.get_stats() == {"requests": 3, "batches": 1, "runs": 2}
+    
+    @pytest.mark.asyncio
+    async def test_requests_with_history_are_not_coalesced(self):
+        """Test requests carrying message history always get their own run."""
+        queue = LLMBatchQueue(flush_ms=50)
+        ai_agent = FakeAIAgent()
+        
+        await asyncio.gather(
+            queue.submit(ai_agent, "same", ["previous"]),
+            queue.submit(ai_agent, "same", ["previous"])
+        )
+        await queue.stop()
+        
+        assert ai_agent.prompts == ["same", "same"]
+    
+    @pytest.mark.asyncio
+    async def test_max_batch_flushes_early(self):
+        """Test a full batch is dispatched without waiting for the window."""
+        queue = LLMBatchQueue(max_batch=2, flush_ms=10000)
+        ai_agent = FakeAIAgent()
+        
+        results = await asyncio.wait_for(
+            asyncio.gather(queue.submit(ai_agent, "a"), queue.submit(ai_agent, "b")),
+            timeout=1.0
+        )
+        await queue.stop()
+        
+        assert results == ["result: a", "result: b"]
+    
+    @pytest.mark.asyncio
+    async def test_run_error_propagates(self):
+        """Test a failing run raises in every caller waiting on it."""
+        queue = LLMBatchQueue(flush_ms=1)
+        ai_agent = FakeAIAgent(fail=True)
+        
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            await queue.submit(ai_agent, "hello")
+        await queue.stop()
@@ -16,6 +16,31 @@ from genflow.communication import (
 )
 
 
+async def wait_until(predicate, timeout: float = 1.0, interval: float = 0.001) -> None:
+    """Wait until ``predicate()`` is true, failing the test after ``timeout`` seconds."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition not met before timeout"
+        await asyncio.sleep(interval)
+
+
+@pytest.fixture(scope="module")
+async def started_message_bus():
+    """Start one message bus shared by the tests in this module."""
+    bus = MessageBus()
+    await bus.start()
+    yield bus
+    await bus.stop()
+
+
+@pytest.fixture
+def running_message_bus(started_message_bus):
+    """Provide the shared running message bus, reset after each test."""
+    yield started_message_bus
+    started_message_bus.reset()
+
+
 class TestMessageFilter:
     """Test MessageFilter model."""
     
@@ -47,9 +72,9 @@ class TestMessageFilter:
 class TestMessageHandler:
     """Test MessageHandler functionality."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def sample_message(self):
-        """Create sample message for testing."""
+        """Create a sample message, shared by the whole class since messages are frozen."""
         return AgentMessage(
             sender="agent1",
             recipient="agent2",
@@ -109,6 +134,20 @@ class TestMessageHandler:
         
         assert handler.matches(sample_message) is False
     
+    @pytest.mark.parametrize("filter_kwargs,expected", [
+        ({}, True),
+        ({"sender": "agent1", "recipient": "agent2"}, True),
+        ({"sender": "agent1", "recipient": "agent3"}, False),
+        ({"recipient": "agent2", "metadata_filters": {"priority": "high"}}, True),
+        ({"recipient": "agent2", "metadata_filters": {"priority": "low"}}, False),
+        ({"metadata_filters": {"missing": None}}, False),
+    ])
+    def test_message_matching_combinations(self, sample_message, filter_kwargs, expected):
+        """Test matching with several criteria set, or none."""
+        handler = MessageHandler(MagicMock(), MessageFilter(**filter_kwargs))
+        
+        assert handler.matches(sample_message) is expected
+    
     @pytest.mark.asyncio
     async def test_handle_sync_function(self, sample_message):
         """Test handling message with sync function."""
@@ -154,9 +193,9 @@ class TestMessageQueue:
         """Create message queue."""
         return MessageQueue()
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def sample_messages(self):
-        """Create sample messages."""
+        """Create sample messages, shared by the whole class."""
         return [
             AgentMessage(sender="agent1", recipient="agent2", content="Message 1"),
             AgentMessage(sender="agent2", recipient="agent1", content="Message 2"),
@@ -187,12 +226,61 @@ class TestMessageQueue:
         assert queue.qsize() == 3
         
         # Get all messages
-        retrieved = []
-        while not queue.empty():
-            retrieved.append(await queue.get())
+        retrieved = queue.drain_nowait()
         
         assert len(retrieved) == 3
         assert retrieved == sample_messages
+        assert queue.empty()
+        assert queue.drain_nowait() == []
+    
+    @pytest.mark.asyncio
+    async def test_put_many(self, sample_messages):
+        """Test putting several messages at once up to the queue size."""
+        queue = MessageQueue(max_size=2)
+        
+        assert queue.put_many_nowait(sample_messages) == 2
+        assert queue.qsize() == 2
+        
+        pending_put = asyncio.create_task(queue.put_many(sample_messages[2:]))
+        await asyncio.sleep(0)
+        assert not pending_put.done()
+        
+        assert await queue.get() == sample_messages[0]
+        await pending_put
+        assert [queue.get_nowait(), queue.get_nowait()] == sample_messages[1:]
+        assert queue.get_history() == sample_messages
+    
+    @pytest.mark.asyncio
+    async def test_get_waits_for_put(self, queue, sample_messages):
+        """Test get blocks until a message is put."""
+        pending_get = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+        assert not pending_get.done()
+        
+        queue.put_nowait(sample_messages[0])
+        assert await pending_get == sample_messages[0]
+        assert queue.empty()
+        
+        with pytest.raises(asyncio.QueueEmpty):
+            queue.get_nowait()
+    
+    @pytest.mark.asyncio
+    async def test_put_waits_when_full(self, sample_messages):
+        """Test put falls back to waiting when the queue is full."""
+        queue = MessageQueue(max_size=1)
+        queue.put_nowait(sample_messages[0])
+        
+        with pytest.raises(asyncio.QueueFull):
+            queue.put_nowait(sample_messages[1])
+        
+        pending_put = asyncio.create_task(queue.put(sample_messages[1]))
+        await asyncio.sleep(0)
+        assert not pending_put.done()
+        
+        assert await queue.get() == sample_messages[0]
+        await pending_put
+        assert await queue.get() == sample_messages[1]
+        assert queue.get_history() == sample_messages[:2]
     
     @pytest.mark.asyncio
     async def test_message_history(self, queue, sample_messages):
@@ -215,6 +303,16 @@ class TestMessageQueue:
         assert len(history) == 2
         assert history == sample_messages[-2:]  # Last 2 messages
     
+    @pytest.mark.asyncio
+    async def test_message_history_is_bounded(self, sample_messages):
+        """Test history keeps only the most recent messages."""
+        queue = MessageQueue(max_history=2)
+        for msg in sample_messages:
+            await queue.put(msg)
+        
+        assert queue.get_history() == sample_messages[-2:]
+        assert queue.get_history(limit=1) == sample_messages[-1:]
+    
     @pytest.mark.asyncio
     async def test_message_history_with_filter(self, queue, sample_messages):
         """Test message history with filter."""
@@ -237,13 +335,6 @@ class TestMessageBus:
         """Create message bus."""
         return MessageBus()
     
-    @pytest.fixture
-    async def running_message_bus(self, message_bus):
-        """Create and start message bus."""
-        await message_bus.start()
-        yield message_bus
-        await message_bus.stop()
-    
     @pytest.mark.asyncio
     async def test_start_stop_lifecycle(self, message_bus):
         """Test message bus start/stop lifecycle."""
@@ -269,6 +360,14 @@ class TestMessageBus:
         assert agent_id not in message_bus._agents
         assert agent_id not in message_bus._queues
     
+    def test_agent_ids_are_interned(self, message_bus):
+        """Test registered IDs and message addresses share one string object."""
+        message_bus.register_agent("".join(["agent", "42"]))
+        message = AgentMessage(sender="agent1", recipient="".join(["agent", "42"]), content="Hi")
+        
+        assert message.recipient is next(iter(message_bus._agents))
+        assert message.recipient is next(iter(message_bus._queues))
+    
     def test_message_handler_subscription(self, message_bus):
         """Test message handler subscription."""
         handler_func = MagicMock()
@@ -287,6 +386,38 @@ class TestMessageBus:
         assert success is True
         assert len(message_bus._handlers) == 0
     
+    @pytest.mark.asyncio
+    async def test_handlers_routed_by_filter(self, message_bus):
+        """Test handlers only receive messages matching their filters."""
+        received = {"recipient": [], "sender": [], "type": [], "all": [], "metadata": []}
+        
+        message_bus.subscribe(lambda m: received["recipient"].append(m.id), recipient="agent2")
+        sender_id = message_bus.subscribe(lambda m: received["sender"].append(m.id), sender="agent3")
+        message_bus.subscribe(lambda m: received["type"].append(m.id), message_type="status")
+        message_bus.subscribe(lambda m: received["all"].append(m.id))
+        metadata_id = message_bus.subscribe(
+            lambda m: received["metadata"].append(m.id), recipient="agent2", priority="high"
+        )
+        
+        direct = AgentMessage(sender="agent1", recipient="agent2", content="Direct")
+        status = AgentMessage(sender="agent1", recipient="agent3", content="Status", message_type="status")
+        urgent = AgentMessage(sender="agent1", recipient="agent2", content="Urgent", metadata={"priority": "high"})
+        reply = AgentMessage(sender="agent3", recipient="agent1", content="Reply")
+        for message in (direct, status, urgent, reply):
+            await message_bus._process_handlers(message)
+        
+        assert received["recipient"] == [direct.id, urgent.id]
+        assert received["sender"] == [reply.id]
+        assert received["type"] == [status.id]
+        assert received["all"] == [direct.id, status.id, urgent.id, reply.id]
+        assert received["metadata"] == [urgent.id]
+        
+        assert message_bus.unsubscribe(metadata_id) is True
+        assert message_bus.unsubscribe(metadata_id) is False
+        assert len(message_bus._by_recipient["agent2"]) == 1
+        assert message_bus.unsubscribe(sender_id) is True
+        assert "agent3" not in message_bus._by_sender
+    
     @pytest.mark.asyncio
     async def test_send_message(self, running_message_bus):
         """Test sending messages."""
@@ -298,14 +429,14 @@ class TestMessageBus:
         
         success = await running_message_bus.send_message(message)
         assert success is True
-        assert running_message_bus._stats["messages_sent"] == 1
+        assert running_message_bus.get_stats()["messages_sent"] == 1
     
     @pytest.mark.asyncio
     async def test_send_broadcast(self, running_message_bus):
         """Test sending broadcast messages."""
-        running_message_bus.register_agent("agent1")
-        running_message_bus.register_agent("agent2") 
-        running_message_bus.register_agent("agent3")
+        agent_ids = ("agent1", "agent2", "agent3")
+        for agent_id in agent_ids:
+            running_message_bus.register_agent(agent_id)
         
         success = await running_message_bus.send_broadcast(
             "broadcaster",
@@ -315,16 +446,36 @@ class TestMessageBus:
         
         assert success is True
         
-        # Allow time for processing
-        await asyncio.sleep(0.1)
-        
-        # Each registered agent should receive the broadcast
-        for agent_id in ["agent1", "agent2", "agent3"]:
+        # Each registered agent should receive the broadcast; get_messages waits for it
+        for agent_id in agent_ids:
             messages = await running_message_bus.get_messages(agent_id)
             assert len(messages) == 1
             assert messages[0].content == "Hello everyone!"
             assert messages[0].message_type == "greeting"
     
+    @pytest.mark.asyncio
+    async def test_broadcast_waits_only_for_full_queues(self, message_bus):
+        """Test broadcast delivery skips the sender and waits for full queues."""
+        for agent_id in ["sender", "agent1", "agent2"]:
+            message_bus.register_agent(agent_id)
+        message_bus._queues["agent2"] = MessageQueue(max_size=1)
+        message_bus._queues["agent2"].put_nowait(
+            AgentMessage(sender="other", recipient="agent2", content="Backlog")
+        )
+        
+        broadcast = AgentMessage(sender="sender", recipient="*", content="Hello")
+        delivery = asyncio.create_task(message_bus._route_message(broadcast))
+        await asyncio.sleep(0)
+        
+        assert not delivery.done()
+        assert message_bus._queues["agent1"].qsize() == 1
+        assert message_bus._queues["sender"].empty()
+        
+        await message_bus._queues["agent2"].get()
+        await delivery
+        assert await message_bus._queues["agent2"].get() is broadcast
+        assert await message_bus._queues["agent1"].get() is broadcast
+    
     @pytest.mark.asyncio
     async def test_get_messages_for_agent(self, running_message_bus):
         """Test getting messages for specific agent."""
@@ -338,19 +489,80 @@ class TestMessageBus:
         )
         
         await running_message_bus.send_message(message)
-        await asyncio.sleep(0.1)  # Allow processing
         
         messages = await running_message_bus.get_messages(agent_id)
         assert len(messages) == 1
         assert messages[0].content == "Direct message"
     
+    @pytest.mark.asyncio
+    async def test_get_messages_waits_for_first_message(self, message_bus):
+        """Test get_messages blocks until a message arrives or the timeout passes."""
+        agent_id = "test_agent"
+        message_bus.register_agent(agent_id)
+        
+        assert await message_bus.get_messages(agent_id, timeout=0.01) == []
+        
+        pending = asyncio.create_task(message_bus.get_messages(agent_id, timeout=1.0))
+        await asyncio.sleep(0)
+        for i in range(3):
+            await message_bus._route_message(
+                AgentMessage(sender="sender", recipient=agent_id, content=f"Message {i}")
+            )
+        
+        messages = await pending
+        assert [m.content for m in messages] == ["Message 0", "Message 1", "Message 2"]
+    
+    @pytest.mark.asyncio
+    async def test_expected_response_resolved_on_delivery(self, message_bus):
+        """Test a reply from the expected responder resolves the waiting future."""
+        message_bus.register_agent("requester")
+        response = message_bus.expect_response("corr-1", "responder")
+        
+        # The outgoing request carries the same correlation ID but is not a reply
+        await message_bus._route_message(AgentMessage(
+            sender="requester", recipient="responder", content="Question",
+            metadata={"correlation_id": "corr-1", "expects_response": True}
+        ))
+        assert not response.done()
+        
+        reply = AgentMessage(
+            sender="responder", recipient="requester", content="Answer",
+            metadata={"correlation_id": "corr-1"}
+        )
+        await message_bus._route_message(reply)
+        
+        assert await response is reply
+        assert message_bus._queues["requester"].empty()
+        assert "corr-1" not in message_bus._pending_responses
+    
+    @pytest.mark.asyncio
+    async def test_batched_dispatch_routes_all_messages(self):
+        """Test the processor routes queued messages across several batches."""
+        message_bus = MessageBus(dispatch_batch_size=2)
+        message_bus.register_agent("agent1")
+        for i in range(5):
+            await message_bus.send_message(AgentMessage(sender="sender", recipient="agent1", content=f"Message {i}"))
+        
+        await message_bus.start()
+        try:
+            messages = []
+            while len(messages) < 5:
+                messages.extend(await message_bus.get_messages("agent1", timeout=1.0))
+        finally:
+            await message_bus.stop()
+        
+        assert [m.content for m in messages] == [f"Message {i}" for i in range(5)]
+        assert message_bus.get_stats()["messages_delivered"] == 5
+    
     @pytest.mark.asyncio
     async def test_message_handler_processing(self, running_message_bus):
         """Test message processing through handlers."""
         handled_messages = []
+        handled = asyncio.Event()
         
         def test_handler(message):
             handled_messages.append(message)
+            handled.set()
             return AgentResponse(success=True, result="handled")
         
         # Subscribe handler
@@ -365,7 +577,7 @@ class TestMessageBus:
         )
         
         await running_message_bus.send_message(message)
-        await asyncio.sleep(0.1)  # Allow processing
+        await asyncio.wait_for(handled.wait(), timeout=1.0)
         
         assert len(handled_messages) == 1
         assert handled_messages[0].content == "Test message"
@@ -383,23 +595,29 @@ class TestMessageBus:
         assert stats["registered_agents"] == 2
         assert stats["active_handlers"] == 0
         assert "queue_sizes" in stats
+    
+    @pytest.mark.asyncio
+    async def test_reset(self, message_bus):
+        """Test reset clears agents, handlers, queued messages, pending replies and stats."""
+        message_bus.register_agent("agent1")
+        message_bus.subscribe(MagicMock(), sender="agent2")
+        response = message_bus.expect_response("corr-1", "agent2")
+        await message_bus.send_message(AgentMessage(sender="agent2", recipient="agent1", content="Queued"))
+        
+        message_bus.reset()
+        
+        stats = message_bus.get_stats()
+        assert stats["registered_agents"] == 0
+        assert stats["active_handlers"] == 0
+        assert stats["messages_sent"] == 0
+        assert message_bus._global_queue.empty()
+        assert message_bus.get_message_history() == []
+        assert response.cancelled()
 
 
 class TestAgentCommunication:
     """Test AgentCommunication interface."""
     
-    @pytest.fixture
-    def message_bus(self):
-        """Create message bus."""
-        return MessageBus()
-    
-    @pytest.fixture
-    async def running_message_bus(self, message_bus):
-        """Create and start message bus."""
-        await message_bus.start()
-        yield message_bus
-        await message_bus.stop()
-    
     @pytest.fixture
     def agent_comm(self, running_message_bus):
         """Create agent communication interface."""
@@ -416,8 +634,6 @@ class TestAgentCommunication:
         success = await agent_comm.send(recipient, "Hello!", "greeting")
         assert success is True
         
-        await asyncio.sleep(0.1)  # Allow processing
-        
         messages = await running_message_bus.get_messages(recipient)
         assert len(messages) == 1
         assert messages[0].sender == agent_comm.agent_id
@@ -435,8 +651,6 @@ class TestAgentCommunication:
         success = await agent_comm.broadcast("Hello everyone!", "announcement")
         assert success is True
         
-        await asyncio.sleep(0.1)  # Allow processing
-        
         # Each agent should receive the broadcast
         for agent_id in other_agents:
             messages = await running_message_bus.get_messages(agent_id)
@@ -455,7 +669,6 @@ class TestAgentCommunication:
         )
         
         await running_message_bus.send_message(message)
-        await asyncio.sleep(0.1)  # Allow processing
         
         messages = await agent_comm.receive()
         assert len(messages) == 1
@@ -483,7 +696,7 @@ class TestAgentCommunication:
         )
         
         await running_message_bus.send_message(message)
-        await asyncio.sleep(0.1)  # Allow processing
+        await wait_until(lambda: handled_messages)
         
         assert len(handled_messages) == 1
         assert handled_messages[0].content == "Important message"
@@ -498,17 +711,17 @@ class TestAgentCommunication:
         running_message_bus.register_agent(responder_id)
         
         # Set up responder
-        def response_handler(message):
+        async def response_handler(message):
             if message.metadata.get("expects_response"):
                 # Send response
-                asyncio.create_task(running_message_bus.send_message(
+                await running_message_bus.send_message(
                     AgentMessage(
                         sender=responder_id,
                         recipient=message.sender,
                         content=f"Response to: {message.content}",
                         metadata={"correlation_id": message.metadata["correlation_id"]}
                     )
-                ))
+                )
         
         running_message_bus.subscribe(
             response_handler,
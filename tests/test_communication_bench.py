@@ -0,0 +1,84 @@
+"""
+Benchmarks for the GenFlow message bus hot path.
+
+Requires pytest-benchmark; skipped when it is not installed.
+"""
+
+import asyncio
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from genflow.agents import AgentMessage
+from genflow.communication import MessageBus, MessageQueue
+
+N_MESSAGES = 10_000
+
+
+@pytest.fixture
+def aio_benchmark(benchmark, event_loop):
+    """Benchmark a coroutine function by running it to completion on the test event loop."""
+    def run(func, *args, **kwargs):
+        return benchmark(lambda: event_loop.run_until_complete(func(*args, **kwargs)))
+    return run
+
+
+@pytest.fixture
+def bus(event_loop):
+    """Create and start a message bus outside of any running loop."""
+    bus = MessageBus()
+    event_loop.run_until_complete(bus.start())
+    yield bus
+    event_loop.run_until_complete(bus.stop())
+
+
+@pytest.mark.benchmark(group="messagebus")
+def test_send_and_deliver(aio_benchmark, bus):
+    """Benchmark sending messages to one agent and draining its queue."""
+    bus.register_agent("sink")
+    # Room for a whole round, so delivery never waits on the consumer
+    bus._queues["sink"] = MessageQueue(max_size=N_MESSAGES)
+    messages = [
+        AgentMessage(sender="source", recipient="sink", content=f"message {i}")
+        for i in range(N_MESSAGES)
+    ]
+
+    async def send_and_drain():
+        for message in messages:
+            await bus.send_message(message)
+        received = 0
+        while received < N_MESSAGES:
+            received += len(await bus.get_messages("sink"))
+        return received
+
+    assert aio_benchmark(send_and_drain) == N_MESSAGES
+
+
+@pytest.mark.benchmark(group="messagebus")
+def test_handler_dispatch(aio_benchmark, bus):
+    """Benchmark routing messages through a subscribed handler."""
+    messages = [
+        AgentMessage(sender="source", recipient="*", content=f"message {i}", message_type="bench")
+        for i in range(N_MESSAGES)
+    ]
+    handled = 0
+    done = None
+
+    def handler(message):
+        nonlocal handled
+        handled += 1
+        if handled == N_MESSAGES:
+            done.set()
+
+    bus.subscribe(handler, message_type="bench")
+
+    async def send_and_handle():
+        nonlocal handled, done
+        handled = 0
+        done = asyncio.Event()
+        for message in messages:
+            await bus.send_message(message)
+        await asyncio.wait_for(done.wait(), timeout=10.0)
+        return handled
+
+    assert aio_benchmark(send_and_handle) == N_MESSAGES
@@ -0,0 +1,108 @@
+"""
+Tests for GenFlow execution state storage.
+"""
+
+import pytest
+
+from genflow.agents import AgentResponse
+from genflow.state import InMemoryStore, RedisStore
+from genflow.workflow import (
+    TaskDefinition,
+    TaskStatus,
+    WorkflowDefinition,
+    WorkflowEngine,
+    WorkflowExecution,
+    WorkflowStatus,
+)
+
+
+class FakeRedis:
+    """Minimal async stand-in for a redis.asyncio client."""
+    
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+    
+    async def set(self, key, value, px=None):
+        self.data[key] = value
+        self.expiry[key] = px
+    
+    async def get(self, key):
+        return self.data.get(key)
+
+
+class StaticAgent:
+    """Agent that always succeeds immediately."""
+    
+    def __init__(self, agent_id: str):
+        self.id = agent_id
+    
+    async def execute(self, task: str, context=None) -> AgentResponse:
+        """Return a successful response."""
+        return AgentResponse(success=True, result=f"done: {task}")
+
+
+class TestRedisStore:
+    """Test RedisStore functionality."""
+    
+    @pytest.mark.asyncio
+    async def test_execution_round_trip(self):
+        """Test an execution is stored as JSON and loaded back."""
+        client = FakeRedis()
+        store = RedisStore(prefix="test", ttl=60, client=client)
+        execution = WorkflowExecution(workflow_id="wf1", status=WorkflowStatus.RUNNING)
+        execution.update_task_status("task1", TaskStatus.RUNNING)
+        execution.update_task_status("task1", TaskStatus.SUCCESS, AgentResponse(success=True, result="ok"))
+        
+        await store.save_execution(execution)
+        loaded = await store.load_execution("wf1")
+        
+        assert isinstance(client.data["test:wf:wf1"], str)
+        assert client.expiry["test:wf:wf1"] == 60000
+        assert loaded.status == WorkflowStatus.RUNNING
+        assert loaded.get_task_execution("task1").result.result == "ok"
+        assert loaded.get_task_execution("task1").start_time == execution.get_task_execution("task1").start_time
+    
+    @pytest.mark.asyncio
+    async def test_load_missing_execution(self):
+        """Test loading an unknown workflow returns None."""
+        store = RedisStore(client=FakeRedis())
+        
+        assert await store.load_execution("missing") is None
+
+
+class TestEngineStateStore:
+    """Test WorkflowEngine persistence through a state store."""
+    
+    @pytest.mark.asyncio
+    async def test_execution_restored_by_new_engine(self):
+        """Test a second engine sharing the store sees the finished run."""
+        store = InMemoryStore()
+        engine = WorkflowEngine(store=store)
+        engine.register_agent(StaticAgent("agent1"))
+        tasks = [TaskDefinition(id="task1", name="Task 1", agent_id="agent1", task_description="Task 1")]
+        workflow_id = engine.create_workflow(WorkflowDefinition(name="Stored", tasks=tasks))
+        
+        await engine.execute_workflow(workflow_id)
+        
+        restarted = WorkflowEngine(store=store)
+        assert restarted.get_workflow_status(workflow_id) is None
+        execution = await restarted.load_workflow_status(workflow_id)
+        assert execution.status == WorkflowStatus.SUCCESS
+        assert execution.get_task_execution("task1").status == TaskStatus.SUCCESS
+    
+    @pytest.mark.asyncio
+    async def test_store_errors_do_not_fail_workflow(self):
+        """Test a failing store only logs and the workflow still completes."""
+        class BrokenStore(InMemoryStore):
+            async def save_execution(self, execution):
+                raise ConnectionError("store unavailable")
+        
+        engine = WorkflowEngine(store=BrokenStore())
+        engine.register_agent(StaticAgent("agent1"))
+        tasks = [TaskDefinition(id="task1", name="Task 1", agent_id="agent1", task_description="Task 1")]
+        workflow_id = engine.create_workflow(WorkflowDefinition(name="Stored", tasks=tasks))
+        
+        execution = await engine.execute_workflow(workflow_id)
+        
+        assert execution.status == WorkflowStatus.SUCCESS
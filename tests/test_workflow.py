@@ -3,11 +3,11 @@ Tests for GenFlow workflow engine.
 """
 
 import asyncio
+import functools
 import pytest
-from datetime import datetime
-from unittest.mock import AsyncMock, MagicMock
+from datetime import datetime, timedelta, timezone
 
-from genflow.agents import Agent, AgentConfig, AgentResponse
+from genflow.agents import Agent, AgentConfig, AgentResponse, BaseAgent
 from genflow.workflow import (
     TaskDefinition,
     TaskExecution,
@@ -17,6 +17,7 @@ from genflow.workflow import (
     WorkflowEngine,
     WorkflowExecution,
     WorkflowStatus,
+    get_task_result,
 )
 
 
@@ -58,6 +59,13 @@ class TestTaskDefinition:
         assert task.retry_count == 5
         assert task.timeout == 600.0
         assert task.context == {"key": "value"}
+    
+    def test_dependency_ids_are_interned(self):
+        """Test dependency IDs share the string object of the task ID."""
+        dependency = TaskDefinition(id="".join(["fetch", "_data"]), name="t1", agent_id="a", task_description="d")
+        task = TaskDefinition(id="t2", name="t2", agent_id="a", task_description="d", depends_on=["fetch_data"])
+        
+        assert task.depends_on[0] is dependency.id
 
 
 class TestTaskExecution:
@@ -79,9 +87,9 @@ class TestTaskExecution:
 class TestWorkflowDefinition:
     """Test WorkflowDefinition model."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def sample_tasks(self):
-        """Create sample tasks for testing."""
+        """Create sample tasks for testing, shared by the class since no test modifies them."""
         return [
             TaskDefinition(
                 id="task1",
@@ -132,73 +140,134 @@ class TestWorkflowDefinition:
         missing = workflow.get_task("missing")
         assert missing is None
     
-    def test_get_dependencies(self, sample_tasks):
-        """Test getting task dependencies.""" 
+    @pytest.mark.parametrize("method,task_id,expected", [
+        ("get_dependencies", "task1", []),
+        ("get_dependencies", "task2", ["task1"]),
+        ("get_dependencies", "task3", ["task2"]),
+        ("get_dependents", "task1", ["task2"]),
+        ("get_dependents", "task2", ["task3"]),
+        ("get_dependents", "task3", []),
+    ])
+    def test_dependency_lookups(self, sample_tasks, method, task_id, expected):
+        """Test getting task dependencies and dependents."""
         workflow = WorkflowDefinition(name="Test", tasks=sample_tasks)
         
-        deps1 = workflow.get_dependencies("task1")
-        assert deps1 == []
+        assert getattr(workflow, method)(task_id) == expected
+    
+    def test_topological_order(self, sample_tasks):
+        """Test tasks are ordered after their dependencies."""
+        workflow = WorkflowDefinition(name="Test", tasks=list(reversed(sample_tasks)))
         
-        deps2 = workflow.get_dependencies("task2")
-        assert deps2 == ["task1"]
+        assert workflow.topological_order() == ["task1", "task2", "task3"]
+    
+    def test_graph_tracks_added_tasks(self, sample_tasks):
+        """Test lookups see tasks appended after the first lookup once the graph is invalidated."""
+        workflow = WorkflowDefinition(name="Test", tasks=sample_tasks[:2])
+        assert workflow.get_task("task3") is None
+        
+        workflow.tasks.append(sample_tasks[2])
+        workflow.invalidate_graph()
         
-        deps3 = workflow.get_dependencies("task3")
-        assert deps3 == ["task2"]
+        assert workflow.get_task("task3") is sample_tasks[2]
+        assert workflow.get_dependents("task2") == ["task3"]
     
-    def test_get_dependents(self, sample_tasks):
-        """Test getting task dependents."""
-        workflow = WorkflowDefinition(name="Test", tasks=sample_tasks)
+    def test_graph_rebuilt_on_assignment(self, sample_tasks):
+        """Test replacing the task list or global context rebuilds the graph, even at the same length."""
+        workflow = WorkflowDefinition(name="Test", tasks=sample_tasks[:2], global_context={"repo": "a"})
+        assert workflow.get_dependents("task1") == ["task2"]
         
-        dependents1 = workflow.get_dependents("task1")
-        assert dependents1 == ["task2"]
+        workflow.tasks = [sample_tasks[0], sample_tasks[2]]
+        workflow.global_context = {"repo": "b"}
         
-        dependents2 = workflow.get_dependents("task2")
-        assert dependents2 == ["task3"]
+        assert workflow.get_task("task2") is None
+        assert workflow.get_dependents("task1") == []
+        assert workflow._task_context("task1", {})["repo"] == "b"
+    
+    def test_graph_rebuilt_after_in_place_edits(self):
+        """Test in-place dependency and context edits are picked up after invalidate_graph."""
+        tasks = [
+            TaskDefinition(id="task1", name="Task 1", agent_id="agent1", task_description="Task 1"),
+            TaskDefinition(id="task2", name="Task 2", agent_id="agent1", task_description="Task 2")
+        ]
+        workflow = WorkflowDefinition(name="Test", tasks=tasks, global_context={"repo": "a"})
+        assert workflow.get_dependents("task1") == []
+        
+        tasks[1].depends_on.append("task1")
+        workflow.global_context["repo"] = "b"
+        workflow.invalidate_graph()
         
-        dependents3 = workflow.get_dependents("task3")
-        assert dependents3 == []
+        assert workflow.get_dependents("task1") == ["task2"]
+        assert workflow.topological_order() == ["task1", "task2"]
+        assert workflow._task_context("task2", {})["repo"] == "b"
     
-    def test_validate_dependencies_valid(self, sample_tasks):
-        """Test validating valid dependencies."""
-        workflow = WorkflowDefinition(name="Test", tasks=sample_tasks)
+    def test_task_context_merging(self):
+        """Test task contexts layer global, task and execution context."""
+        task = TaskDefinition(
+            id="task1",
+            name="Task 1",
+            agent_id="agent1",
+            task_description="Task 1",
+            context={"branch": "dev", "path": "src"}
+        )
+        workflow = WorkflowDefinition(name="Test", tasks=[task], global_context={"repo": "a", "branch": "main"})
         
-        assert workflow.validate_dependencies() is True
+        assert workflow._task_context("task1", {}) == {"repo": "a", "branch": "dev", "path": "src"}
+        workflow._task_context("task1", {})["repo"] = "b"
+        assert workflow._task_context("task1", {})["repo"] == "a"
+        assert type(workflow._task_context("task1", {})) is dict
+        assert workflow._task_context("task1", {"path": "docs"}) == {"repo": "a", "branch": "dev", "path": "docs"}
+        
+        workflow.global_context = {"repo": "b"}
+        assert workflow._task_context("task1", {})["repo"] == "b"
     
-    def test_validate_dependencies_missing(self):
-        """Test validating with missing dependencies."""
+    @pytest.mark.parametrize("dependencies,expected", [
+        ({"task1": [], "task2": ["task1"], "task3": ["task2"]}, True),
+        ({"task1": ["missing_task"]}, False),
+        ({"task1": ["task2"], "task2": ["task1"]}, False),
+        # A cycle behind a ready task, including a self-dependency
+        ({"root": [], "loop": ["root", "loop"], "after": ["loop"]}, False),
+    ], ids=["valid", "missing", "cycle", "cycle_below_root"])
+    def test_validate_dependencies(self, dependencies, expected):
+        """Test validating dependencies that are valid, missing or cyclic."""
         tasks = [
-            TaskDefinition(
-                id="task1",
-                name="Task 1",
-                agent_id="agent1",
-                task_description="Task 1",
-                depends_on=["missing_task"]
-            )
+            TaskDefinition(id=task_id, name=task_id, agent_id="agent1", task_description=task_id, depends_on=deps)
+            for task_id, deps in dependencies.items()
         ]
         workflow = WorkflowDefinition(name="Test", tasks=tasks)
         
+        assert workflow.validate_dependencies() is expected
+    
+    def test_validation_result_reused_until_tasks_change(self, sample_tasks):
+        """Test validation runs once per task graph and again after tasks are added."""
+        workflow = WorkflowDefinition(name="Test", tasks=sample_tasks[:2])
+        
+        assert workflow.validate_dependencies() is True
+        assert workflow._graph().valid is True
+        
+        workflow.tasks.append(
+            TaskDefinition(id="task4", name="Task 4", agent_id="agent1", task_description="Task 4", depends_on=["missing"])
+        )
+        workflow.invalidate_graph()
         assert workflow.validate_dependencies() is False
     
-    def test_validate_dependencies_cycle(self):
-        """Test validating with cyclic dependencies."""
+    def test_validate_dependencies_deep_chain(self):
+        """Test validating a chain deeper than the recursion limit."""
+        depth = 5000
         tasks = [
             TaskDefinition(
-                id="task1",
-                name="Task 1", 
+                id=f"task{i}",
+                name=f"Task {i}",
                 agent_id="agent1",
-                task_description="Task 1",
-                depends_on=["task2"]
-            ),
-            TaskDefinition(
-                id="task2",
-                name="Task 2",
-                agent_id="agent2", 
-                task_description="Task 2",
-                depends_on=["task1"]
+                task_description=f"Task {i}",
+                depends_on=[f"task{i - 1}"] if i else []
             )
+            for i in range(depth)
         ]
         workflow = WorkflowDefinition(name="Test", tasks=tasks)
+        assert workflow.validate_dependencies() is True
         
+        tasks[0].depends_on.append(f"task{depth - 1}")
+        workflow = WorkflowDefinition(name="Test", tasks=tasks)
         assert workflow.validate_dependencies() is False
 
 
@@ -242,34 +311,129 @@ class TestWorkflowExecution:
         assert task_exec is not None
         assert task_exec.status == TaskStatus.SUCCESS
         assert task_exec.result == result
+    
+    def test_task_timestamps(self):
+        """Test task start and end times are recorded on status changes."""
+        execution = WorkflowExecution(workflow_id="wf1")
+        before = datetime.now(timezone.utc).replace(tzinfo=None)
+        
+        execution.update_task_status("task1", TaskStatus.RUNNING)
+        execution.update_task_status("task1", TaskStatus.SUCCESS)
+        
+        task_exec = execution.get_task_execution("task1")
+        assert task_exec.start_time.tzinfo is None
+        assert before - timedelta(seconds=1) <= task_exec.start_time <= task_exec.end_time
+        assert task_exec.duration >= 0
+    
+    def test_serialized_task_times(self):
+        """Test task executions serialize start and end times as naive UTC datetimes and load back."""
+        execution = WorkflowExecution(workflow_id="wf1")
+        execution.update_task_status("task1", TaskStatus.RUNNING)
+        execution.update_task_status("task1", TaskStatus.SUCCESS, AgentResponse(success=True, result="ok"))
+        task_exec = execution.get_task_execution("task1")
+        
+        data = execution.model_dump(mode="json")["task_executions"]["task1"]
+        assert "start_ns" not in data and "end_ns" not in data
+        assert data["start_time"] == task_exec.start_time.isoformat()
+        
+        loaded = WorkflowExecution.model_validate_json(execution.model_dump_json()).get_task_execution("task1")
+        assert (loaded.start_time, loaded.end_time) == (task_exec.start_time, task_exec.end_time)
+        assert loaded.result == task_exec.result
+
+
+@functools.cache
+def _mock_response(agent_id: str, task: str, should_fail: bool) -> AgentResponse:
+    """Build a MockAgent response; responses are frozen, so each is built once."""
+    if should_fail:
+        return AgentResponse(
+            success=False,
+            error=f"Mock agent {agent_id} failed",
+            metadata={"agent_id": agent_id}
+        )
+    return AgentResponse(
+        success=True,
+        result=f"Agent {agent_id} completed: {task}",
+        metadata={"agent_id": agent_id}
+    )
 
 
 class MockAgent:
-    """Mock agent for testing."""
+    """
+    Mock agent for testing.
+    
+    Runs on virtual time: ``delay`` is added to ``elapsed`` and the agent only
+    yields to the event loop, so tests never wait on the wall clock. Agents
+    created with ``block=True`` stay running until ``release`` is set or they
+    are cancelled; ``started`` is set once any execution begins.
+    """
     
-    def __init__(self, agent_id: str, delay: float = 0.1, should_fail: bool = False):
+    def __init__(self, agent_id: str, delay: float = 0.1, should_fail: bool = False, block: bool = False):
         self.id = agent_id
         self.delay = delay
         self.should_fail = should_fail
+        self.block = block
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.elapsed = 0.0
         self.execution_count = 0
+        self.active = 0
+        self.max_active = 0
     
     async def execute(self, task: str, context=None) -> AgentResponse:
         """Mock execute method."""
-        await asyncio.sleep(self.delay)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.started.set()
+        if self.block:
+            await self.release.wait()
+        self.elapsed += self.delay
+        await asyncio.sleep(0)
+        self.active -= 1
         self.execution_count += 1
-        
-        if self.should_fail:
-            return AgentResponse(
-                success=False,
-                error=f"Mock agent {self.id} failed",
-                metadata={"agent_id": self.id}
-            )
-        else:
-            return AgentResponse(
-                success=True,
-                result=f"Agent {self.id} completed: {task}",
-                metadata={"agent_id": self.id}
-            )
+        return _mock_response(self.id, task, self.should_fail)
+
+
+class ChainAgent(MockAgent):
+    """Mock agent answering task chains in one call; the step ``chain_fails_at`` fails in the chain."""
+    
+    def __init__(self, agent_id: str, chain_fails_at: str = None, chain_error: Exception = None,
+                 chain_delay: float = 0.0, **kwargs):
+        super().__init__(agent_id, **kwargs)
+        self.chain_fails_at = chain_fails_at
+        self.chain_error = chain_error
+        self.chain_delay = chain_delay
+        self.calls = []
+    
+    async def execute(self, task: str, context=None) -> AgentResponse:
+        self.calls.append((task, dict(context)))
+        return await super().execute(task, context)
+    
+    async def execute_chain(self, steps, contexts=None):
+        self.calls.append(([task_id for task_id, _ in steps], {task_id: dict(contexts[task_id]) for task_id, _ in steps}))
+        if self.chain_delay:
+            await asyncio.sleep(self.chain_delay)
+        if self.chain_error:
+            raise self.chain_error
+        results = {}
+        for task_id, description in steps:
+            failed = task_id == self.chain_fails_at
+            results[task_id] = _mock_response(self.id, description, failed)
+            if failed:
+                break
+        return results
+
+
+def _chain_workflow(length: int, **task_kwargs) -> WorkflowDefinition:
+    """Build a linear workflow of tasks t1..tN on agent1, each with context {"step": i}, with chaining on."""
+    builder = WorkflowBuilder("Chain").set_chain_tasks()
+    for i in range(1, length + 1):
+        builder.add_task(
+            f"t{i}", "agent1", f"Task {i}",
+            depends_on=[f"t{i - 1}"] if i > 1 else None,
+            context={"step": i},
+            **task_kwargs
+        )
+    return builder.build()
 
 
 class TestWorkflowEngine:
@@ -289,9 +453,9 @@ class TestWorkflowEngine:
             "agent3": MockAgent("agent3")
         }
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def sample_workflow(self):
-        """Create sample workflow definition."""
+        """Create sample workflow definition, shared by the class; the engine does not modify definitions."""
         tasks = [
             TaskDefinition(
                 id="task1",
@@ -351,8 +515,7 @@ class TestWorkflowEngine:
     async def test_workflow_execution_success(self, engine, sample_workflow, mock_agents):
         """Test successful workflow execution."""
         # Register agents
-        for agent in mock_agents.values():
-            engine.register_agent(agent)
+        engine.register_agents(mock_agents.values())
         
         # Create and execute workflow
         workflow_id = engine.create_workflow(sample_workflow)
@@ -360,6 +523,8 @@ class TestWorkflowEngine:
         
         assert execution.status == WorkflowStatus.SUCCESS
         assert len(execution.task_executions) == 2
+        assert execution.start_time.tzinfo is None
+        assert execution.start_time <= execution.end_time
         
         # Check task1 executed first
         task1_exec = execution.get_task_execution("task1")
@@ -380,8 +545,7 @@ class TestWorkflowEngine:
         mock_agents["agent1"].should_fail = True
         
         # Register agents
-        for agent in mock_agents.values():
-            engine.register_agent(agent)
+        engine.register_agents(mock_agents.values())
         
         # Create and execute workflow
         workflow_id = engine.create_workflow(sample_workflow)
@@ -401,6 +565,321 @@ class TestWorkflowEngine:
         assert mock_agents["agent1"].execution_count >= 1  # Including retries
         assert mock_agents["agent2"].execution_count == 0
     
+    @pytest.mark.asyncio
+    async def test_dependency_results_visible_to_agents(self, engine, sample_workflow, mock_agents):
+        """Test downstream agents can read upstream results during execution."""
+        seen = {}
+        
+        class ReadingAgent(MockAgent):
+            async def execute(self, task, context=None):
+                seen["task1"] = get_task_result("task1")
+                return await super().execute(task, context)
+        
+        engine.register_agent(mock_agents["agent1"])
+        engine.register_agent(ReadingAgent("agent2"))
+        
+        workflow_id = engine.create_workflow(sample_workflow)
+        execution = await engine.execute_workflow(workflow_id)
+        
+        assert seen["task1"] is execution.get_task_execution("task1").result
+        assert get_task_result("task1") is None
+    
+    @pytest.mark.asyncio
+    async def test_description_placeholders_filled_from_context(self, engine, mock_agents):
+        """Test global and task context placeholders are filled, and execution context only overrides them."""
+        engine.register_agent(mock_agents["agent1"])
+        workflow = (WorkflowBuilder("Templated")
+                    .add_task("task1", "agent1", "Report for {quarter} on {repo} as {format} in {\"json\": true}",
+                              context={"repo": "genflow"})
+                    .set_global_context({"quarter": "Q3", "repo": "other"})
+                    .build())
+        workflow_id = engine.create_workflow(workflow)
+        assert workflow._graph().descriptions["task1"] == "Report for Q3 on genflow as {format} in {\"json\": true}"
+        
+        execution = await engine.execute_workflow(workflow_id, {"quarter": "Q4", "format": "markdown"})
+        
+        assert execution.get_task_execution("task1").result.result == (
+            "Agent agent1 completed: Report for Q4 on genflow as {format} in {\"json\": true}"
+        )
+        assert workflow.get_task("task1").task_description.startswith("Report for {quarter}")
+    
+    @pytest.mark.asyncio
+    async def test_workflow_execution_fail_fast(self, engine):
+        """Test a failed task cancels running siblings when fail_fast is set."""
+        failing = MockAgent("agent1", delay=0.01, should_fail=True)
+        slow = MockAgent("agent2", block=True)
+        engine.register_agent(failing)
+        engine.register_agent(slow)
+        
+        tasks = [
+            TaskDefinition(id="task1", name="Task 1", agent_id="agent1", task_description="Task 1", retry_count=0),
+            TaskDefinition(id="task2", name="Task 2", agent_id="agent2", task_description="Task 2")
+        ]
+        workflow = WorkflowDefinition(name="Fail Fast", tasks=tasks, fail_fast=True)
+        workflow_id = engine.create_workflow(workflow)
+        
+        execution = await asyncio.wait_for(engine.execute_workflow(workflow_id), timeout=2.0)
+        
+        assert execution.status == WorkflowStatus.FAILED
+        assert execution.get_task_execution("task1").status == TaskStatus.FAILED
+        assert execution.get_task_execution("task2").status == TaskStatus.SKIPPED
+        assert slow.execution_count == 0
+    
+    @pytest.mark.asyncio
+    async def test_task_chain_runs_in_one_call(self, engine):
+        """Test a same-agent chain is sent in one call with each step's own context."""
+        agent = ChainAgent("agent1")
+        engine.register_agent(agent)
+        workflow_id = engine.create_workflow(_chain_workflow(2))
+        
+        execution = await engine.execute_workflow(workflow_id)
+        
+        assert execution.status == WorkflowStatus.SUCCESS
+        assert agent.calls == [(["t1", "t2"], {"t1": {"step": 1}, "t2": {"step": 2}})]
+        assert execution.get_task_execution("t2").start_ns >= execution.get_task_execution("t1").start_ns
+    
+    @pytest.mark.asyncio
+    async def test_failed_chain_step_counts_as_first_attempt(self, engine):
+        """Test a step failing in the chain is retried individually within its retry budget."""
+        agent = ChainAgent("agent1", chain_fails_at="t2", should_fail=True)
+        engine.register_agent(agent)
+        workflow_id = engine.create_workflow(_chain_workflow(2, retry_count=1))
+        
+        execution = await engine.execute_workflow(workflow_id)
+        
+        assert execution.get_task_execution("t1").status == TaskStatus.SUCCESS
+        assert execution.get_task_execution("t2").status == TaskStatus.FAILED
+        assert execution.get_task_execution("t2").attempts == 1
+        assert agent.calls[1:] == [("Task 2", {"step": 2})]
+    
+    @pytest.mark.asyncio
+    async def test_steps_after_chain_failure_run_individually(self, engine):
+        """Test steps after a retried chain step run on their own rather than from the chain output."""
+        agent = ChainAgent("agent1", chain_fails_at="t2")
+        engine.register_agent(agent)
+        workflow_id = engine.create_workflow(_chain_workflow(3, retry_count=1))
+        
+        execution = await engine.execute_workflow(workflow_id)
+        
+        assert execution.status == WorkflowStatus.SUCCESS
+        assert agent.calls[1:] == [("Task 2", {"step": 2}), ("Task 3", {"step": 3})]
+    
+    @pytest.mark.asyncio
+    async def test_chain_step_fails_on_last_attempt(self, engine):
+        """Test a chain step without retries left fails at once and stops the chain."""
+        agent = ChainAgent("agent1", chain_fails_at="t1", should_fail=True)
+        engine.register_agent(agent)
+        workflow_id = engine.create_workflow(_chain_workflow(2, retry_count=0))
+        
+        execution = await engine.execute_workflow(workflow_id)
+        
+        assert execution.status == WorkflowStatus.FAILED
+        assert execution.get_task_execution("t1").status == TaskStatus.FAILED
+        assert execution.get_task_execution("t1").error == "Mock agent agent1 failed"
+        assert execution.get_task_execution("t2").status == TaskStatus.PENDING
+        assert len(agent.calls) == 1
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("agent_kwargs,error", [
+        ({"chain_error": RuntimeError("provider unavailable")}, "Chain starting at t1 failed: provider unavailable"),
+        ({"chain_delay": 1.0}, "Chain starting at t1 timed out"),
+    ])
+    async def test_chain_call_errors_fail_the_head(self, engine, agent_kwargs, error):
+        """Test a chain call that raises or times out records its error on the head step."""
+        agent = ChainAgent("agent1", **agent_kwargs)
+        engine.register_agent(agent)
+        workflow_id = engine.create_workflow(_chain_workflow(2, retry_count=0, timeout=0.01))
+        
+        execution = await asyncio.wait_for(engine.execute_workflow(workflow_id), timeout=1.0)
+        
+        assert execution.get_task_execution("t1").status == TaskStatus.FAILED
+        assert execution.get_task_execution("t1").error == error
+        assert execution.get_task_execution("t2").status == TaskStatus.PENDING
+    
+    @pytest.mark.asyncio
+    async def test_cacheable_tasks_are_not_chained(self, engine):
+        """Test cacheable steps run on their own, so a second run is served from the result cache."""
+        agent = ChainAgent("agent1")
+        engine.register_agent(agent)
+        workflow_id = engine.create_workflow(_chain_workflow(2, cacheable=True))
+        
+        first = await engine.execute_workflow(workflow_id)
+        second = await engine.execute_workflow(workflow_id)
+        
+        assert first.status == second.status == WorkflowStatus.SUCCESS
+        assert agent.calls == [("Task 1", {"step": 1}), ("Task 2", {"step": 2})]
+        assert len(engine._result_cache) == 2
+        assert second.get_task_execution("t2").result is first.get_task_execution("t2").result
+    
+    def test_default_execute_chain_is_not_chained(self, engine):
+        """Test agents without their own execute_chain get no chains."""
+        class PlainAgent(Agent):
+            execute_chain = BaseAgent.execute_chain
+        
+        engine.register_agent(MockAgent("agent1"))
+        workflow = _chain_workflow(2)
+        assert engine._find_task_chain(workflow, workflow.get_task("t1")) == [workflow.get_task("t1")]
+        
+        plain = PlainAgent(AgentConfig(name="plain"))
+        engine.register_agent(plain)
+        workflow = WorkflowBuilder("Plain").set_chain_tasks().add_task("t1", plain.id, "Task 1").add_task(
+            "t2", plain.id, "Task 2", depends_on=["t1"]
+        ).build()
+        assert len(engine._find_task_chain(workflow, workflow.get_task("t1"))) == 1
+    
+    def test_chaining_is_opt_in(self, engine):
+        """Test tasks are only chained when the workflow enables it and the agent is not batchable."""
+        engine.register_agent(ChainAgent("agent1"))
+        workflow = _chain_workflow(2)
+        assert len(engine._find_task_chain(workflow, workflow.get_task("t1"))) == 2
+        
+        workflow.chain_tasks = False
+        assert len(engine._find_task_chain(workflow, workflow.get_task("t1"))) == 1
+        
+        batched = Agent(AgentConfig(name="batched", model="test", batchable=True))
+        engine.register_agent(batched)
+        workflow = WorkflowBuilder("Batched").set_chain_tasks().add_task("t1", batched.id, "Task 1").add_task(
+            "t2", batched.id, "Task 2", depends_on=["t1"]
+        ).build()
+        assert len(engine._find_task_chain(workflow, workflow.get_task("t1"))) == 1
+    
+    @pytest.mark.asyncio
+    async def test_fused_task_result_split_by_subtask(self, engine, mock_agents):
+        """Test a fused task's result is stored as a dict keyed by subtask ID."""
+        engine.register_agent(mock_agents["agent1"])
+        workflow = WorkflowBuilder("Fused").add_fused_task(
+            "analyze", "agent1", {"issues": "Analyze issues", "prs": "Review pull requests"}
+        ).build()
+        workflow_id = engine.create_workflow(workflow)
+        
+        execution = await engine.execute_workflow(workflow_id)
+        
+        assert execution.get_task_execution("analyze").result.result == {
+            "issues": "Analyze issues",
+            "prs": "Review pull requests"
+        }
+    
+    @pytest.mark.asyncio
+    async def test_fused_task_missing_section_fails(self, engine):
+        """Test a fused task whose response lacks a subtask section fails with the missing IDs."""
+        class UnsectionedAgent(MockAgent):
+            async def execute(self, task, context=None):
+                await super().execute(task, context)
+                return AgentResponse(success=True, result="### issues\nAll fine")
+        
+        engine.register_agent(UnsectionedAgent("agent1"))
+        workflow = WorkflowBuilder("Fused").add_fused_task(
+            "analyze", "agent1", {"issues": "Analyze issues", "prs": "Review pull requests"}, retry_count=0
+        ).build()
+        workflow_id = engine.create_workflow(workflow)
+        
+        execution = await engine.execute_workflow(workflow_id)
+        
+        task_execution = execution.get_task_execution("analyze")
+        assert task_execution.status == TaskStatus.FAILED
+        assert task_execution.error == "Fused task analyze response has no section for: prs"
+    
+    @pytest.mark.asyncio
+    async def test_cacheable_task_results_reused(self, engine, mock_agents):
+        """Test cacheable tasks reuse results from an identical earlier run."""
+        engine.register_agents(mock_agents.values())
+        
+        tasks = [
+            TaskDefinition(id="task1", name="Task 1", agent_id="agent1", task_description="Task 1", cacheable=True),
+            TaskDefinition(id="task2", name="Task 2", agent_id="agent2", task_description="Task 2", depends_on=["task1"])
+        ]
+        workflow_id = engine.create_workflow(WorkflowDefinition(name="Cached", tasks=tasks))
+        
+        first = await engine.execute_workflow(workflow_id)
+        second = await engine.execute_workflow(workflow_id)
+        
+        assert second.status == WorkflowStatus.SUCCESS
+        assert second.get_task_execution("task1").result is first.get_task_execution("task1").result
+        assert mock_agents["agent1"].execution_count == 1
+        assert mock_agents["agent2"].execution_count == 2
+        
+        await engine.execute_workflow(workflow_id, {"repo": "other"})
+        assert mock_agents["agent1"].execution_count == 2
+        
+        engine.clear_result_cache()
+        await engine.execute_workflow(workflow_id)
+        assert mock_agents["agent1"].execution_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_cached_subgraph_skips_dispatch(self, engine, mock_agents):
+        """Test dependents of cache hits are served from the cache too."""
+        engine.register_agents(mock_agents.values())
+        
+        tasks = [
+            TaskDefinition(id="task1", name="Task 1", agent_id="agent1", task_description="Task 1", cacheable=True),
+            TaskDefinition(
+                id="task2", name="Task 2", agent_id="agent2", task_description="Task 2",
+                depends_on=["task1"], cacheable=True
+            )
+        ]
+        workflow_id = engine.create_workflow(WorkflowDefinition(name="Cached", tasks=tasks))
+        
+        first = await engine.execute_workflow(workflow_id)
+        second = await engine.execute_workflow(workflow_id)
+        
+        assert second.status == WorkflowStatus.SUCCESS
+        assert mock_agents["agent1"].execution_count == 1
+        assert mock_agents["agent2"].execution_count == 1
+        for task_id in ("task1", "task2"):
+            assert second.get_task_execution(task_id).fingerprint == first.get_task_execution(task_id).fingerprint
+    
+    @pytest.mark.asyncio
+    async def test_cached_subgraph_skips_chained_dispatch(self, engine):
+        """Test cache hits cascade through same-agent tasks that would otherwise form a chain."""
+        agent = ChainAgent("agent1")
+        engine.register_agent(agent)
+        workflow_id = engine.create_workflow(_chain_workflow(3, cacheable=True))
+        
+        await engine.execute_workflow(workflow_id)
+        calls = list(agent.calls)
+        second = await engine.execute_workflow(workflow_id)
+        
+        assert second.status == WorkflowStatus.SUCCESS
+        assert agent.calls == calls
+    
+    @pytest.mark.asyncio
+    async def test_retries_hold_a_single_slot(self, engine):
+        """Test retries run within the task's slot instead of taking another."""
+        agent = MockAgent("agent1", should_fail=True)
+        engine.register_agent(agent)
+        
+        tasks = [
+            TaskDefinition(id="task1", name="Task 1", agent_id="agent1", task_description="Task 1", retry_count=2)
+        ]
+        workflow = WorkflowDefinition(name="Retry", tasks=tasks, max_parallel_tasks=1)
+        workflow_id = engine.create_workflow(workflow)
+        
+        execution = await asyncio.wait_for(engine.execute_workflow(workflow_id), timeout=2.0)
+        
+        task_execution = execution.get_task_execution("task1")
+        assert task_execution.status == TaskStatus.FAILED
+        assert task_execution.attempts == 2
+        assert agent.execution_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_max_parallel_tasks_respected(self, engine):
+        """Test no more than max_parallel_tasks tasks run at once."""
+        agent = MockAgent("agent1", delay=0.01)
+        engine.register_agent(agent)
+        
+        tasks = [
+            TaskDefinition(id=f"task{i}", name=f"Task {i}", agent_id="agent1", task_description=f"Task {i}")
+            for i in range(6)
+        ]
+        workflow = WorkflowDefinition(name="Parallel", tasks=tasks, max_parallel_tasks=2)
+        workflow_id = engine.create_workflow(workflow)
+        
+        execution = await engine.execute_workflow(workflow_id)
+        
+        assert execution.status == WorkflowStatus.SUCCESS
+        assert agent.execution_count == 6
+        assert agent.max_active == 2
+    
     @pytest.mark.asyncio
     async def test_workflow_execution_missing_agent(self, engine, sample_workflow):
         """Test workflow execution with missing agent."""
@@ -425,8 +904,7 @@ class TestWorkflowEngine:
     def test_get_workflow_status(self, engine, sample_workflow, mock_agents):
         """Test getting workflow status."""
         # Register agents
-        for agent in mock_agents.values():
-            engine.register_agent(agent)
+        engine.register_agents(mock_agents.values())
         
         workflow_id = engine.create_workflow(sample_workflow)
         
@@ -434,12 +912,67 @@ class TestWorkflowEngine:
         status = engine.get_workflow_status(workflow_id)
         assert status is None
     
+    def test_release_consumed_results(self, engine, sample_workflow):
+        """Test results are released once all dependents have finished."""
+        execution = WorkflowExecution(workflow_id=sample_workflow.id)
+        result = AgentResponse(success=True, result="large output")
+        execution.update_task_status("task1", TaskStatus.SUCCESS, result)
+        execution.update_task_status("task2", TaskStatus.RUNNING)
+        
+        engine._release_consumed_results(sample_workflow, execution, "task2")
+        assert execution.get_task_execution("task1").result == result
+        
+        execution.update_task_status("task2", TaskStatus.SUCCESS, result)
+        engine._release_consumed_results(sample_workflow, execution, "task2")
+        assert execution.get_task_execution("task1").result is None
+        assert execution.get_task_execution("task2").result == result
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("release_results", [False, True])
+    async def test_execute_workflow_stream(self, engine, sample_workflow, mock_agents, release_results):
+        """Test streamed task events, with and without releasing consumed results."""
+        engine.register_agents(mock_agents.values())
+        workflow_id = engine.create_workflow(sample_workflow)
+        
+        events = [
+            event async for event in engine.execute_workflow_stream(workflow_id, release_results=release_results)
+        ]
+        
+        assert [event.task_id for event in events] == ["task1", "task2"]
+        assert all(event.status == TaskStatus.SUCCESS and event.error is None for event in events)
+        assert events[0].result.result == "Agent agent1 completed: First task"
+        
+        execution = engine.get_workflow_status(workflow_id)
+        assert execution.status == WorkflowStatus.SUCCESS
+        assert (execution.get_task_execution("task1").result is None) is release_results
+        assert execution.get_task_execution("task2").result == events[1].result
+        assert workflow_id not in engine._task_listeners
+    
+    @pytest.mark.asyncio
+    async def test_execute_workflow_stream_failure(self, engine, mock_agents):
+        """Test a failed task is streamed with its error."""
+        mock_agents["agent1"].should_fail = True
+        engine.register_agent(mock_agents["agent1"])
+        
+        tasks = [
+            TaskDefinition(id="task1", name="Task 1", agent_id="agent1", task_description="Task 1", retry_count=0)
+        ]
+        workflow_id = engine.create_workflow(WorkflowDefinition(name="Failing Stream", tasks=tasks))
+        
+        events = [event async for event in engine.execute_workflow_stream(workflow_id, release_results=True)]
+        
+        assert len(events) == 1
+        assert events[0].status == TaskStatus.FAILED
+        assert events[0].result.success is False
+        assert events[0].error == "Mock agent agent1 failed"
+        assert engine.get_workflow_status(workflow_id).status == WorkflowStatus.FAILED
+    
     @pytest.mark.asyncio
     async def test_cancel_workflow(self, engine, sample_workflow, mock_agents):
         """Test workflow cancellation."""
-        # Register agents with delay
+        # Register agents that keep running until cancelled
         for agent in mock_agents.values():
-            agent.delay = 1.0  # Long delay
+            agent.block = True
             engine.register_agent(agent)
         
         workflow_id = engine.create_workflow(sample_workflow)
@@ -449,8 +982,9 @@ class TestWorkflowEngine:
             engine.execute_workflow(workflow_id)
         )
         
-        # Wait a bit then cancel
-        await asyncio.sleep(0.1)
+        # Cancel once the first task is running
+        await asyncio.wait_for(mock_agents["agent1"].started.wait(), timeout=1.0)
+        assert engine.get_workflow_status(workflow_id).get_task_execution("task1").status == TaskStatus.RUNNING
         cancelled = await engine.cancel_workflow(workflow_id)
         
         assert cancelled is True
@@ -502,6 +1036,15 @@ class TestWorkflowBuilder:
         assert workflow.global_context == context
         assert workflow.max_parallel_tasks == 10
     
+    def test_workflow_building_keeps_description_templates(self):
+        """Test building leaves context placeholders in task descriptions."""
+        builder = (WorkflowBuilder("Test Workflow")
+                   .add_task("task1", "agent1", "Report for {quarter}")
+                   .set_global_context({"quarter": "Q4 2024"}))
+        
+        assert builder.build().get_task("task1").task_description == "Report for {quarter}"
+        assert builder.build().get_task("task1").task_description == "Report for {quarter}"
+    
     def test_workflow_building_with_task_options(self):
         """Test workflow building with task options."""
         workflow = (WorkflowBuilder("Test Workflow")
@@ -520,6 +1063,23 @@ class TestWorkflowBuilder:
         assert task.timeout == 120.0
         assert task.context == {"task_key": "task_value"}
     
+    def test_workflow_building_with_fused_task(self):
+        """Test fusing independent subtasks into a single task."""
+        workflow = (WorkflowBuilder("Test Workflow")
+                   .add_fused_task(
+                       "analyze",
+                       "agent1",
+                       {"issues": "Analyze issues", "prs": "Review pull requests"}
+                   )
+                   .add_task("report", "agent2", "Report", depends_on=["analyze"])
+                   .build())
+        
+        assert len(workflow.tasks) == 2
+        task = workflow.get_task("analyze")
+        assert "### issues\nAnalyze issues" in task.task_description
+        assert "### prs\nReview pull requests" in task.task_description
+        assert task.context == {"fused_subtasks": ["issues", "prs"]}
+    
     def test_workflow_building_invalid_dependencies(self):
         """Test workflow building with invalid dependencies."""
         with pytest.raises(ValueError, match="Invalid workflow dependencies"):